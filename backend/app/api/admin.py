@@ -0,0 +1,173 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, insert, or_, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+import base64
+import os
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+from loguru import logger
+
+from ..db.session import execute_read, get_async_db, unique_violation
+from ..models.user import User
+from ..schemas.user import UserBulkCreate, UserBulkResult, UserListItem, UserPage
+from ..core.security import get_admin_user
+from ..core.hashing import hashing_pool
+
+# Users accepted in one bulk provisioning request
+PROVISION_MAX_USERS = int(os.getenv("PROVISION_MAX_USERS", 500))
+
+# Page sizes for the user listing
+USER_PAGE_SIZE = 50
+USER_PAGE_MAX_SIZE = 200
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+# Columns of the user list view
+USER_LIST_COLUMNS = [getattr(User, field) for field in UserListItem.__fields__]
+
+def encode_cursor(created_at: datetime, user_id: int) -> str:
+    """Opaque cursor for the position after a row"""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()},{user_id}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Position encoded by encode_cursor; raises ValueError if the cursor is malformed"""
+    created_at, user_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(",")
+    return datetime.fromisoformat(created_at), int(user_id)
+
+def user_list_query(limit: int, after: Optional[Tuple[datetime, int]] = None, role: Optional[str] = None,
+                    is_active: Optional[bool] = None, locked: Optional[bool] = None,
+                    search: Optional[str] = None) -> Select:
+    """
+    Newest users first, keyset paginated on (created_at, id): each page starts
+    from an index position rather than skipping rows, so its cost doesn't
+    depend on how deep it is
+    """
+    query = select(*USER_LIST_COLUMNS)
+    if after is not None:
+        query = query.where(tuple_(User.created_at, User.id) < tuple_(*after))
+    if role is not None:
+        query = query.where(User.role == role)
+    if is_active is not None:
+        query = query.where(User.is_active == is_active)
+    if locked is True:
+        query = query.where(User.locked_until > func.now())
+    elif locked is False:
+        query = query.where(or_(User.locked_until.is_(None), User.locked_until <= func.now()))
+    if search:
+        # Case-insensitive prefix match, served by the lower(...) text_pattern_ops indexes
+        pattern = search.lower().replace("/", "//").replace("%", "/%").replace("_", "/_") + "%"
+        query = query.where(or_(
+            func.lower(User.username).like(pattern, escape="/"),
+            func.lower(User.email).like(pattern, escape="/"),
+        ))
+    return query.order_by(User.created_at.desc(), User.id.desc()).limit(limit)
+
+@router.get("/users", response_model=UserPage)
+async def list_users(
+    limit: int = Query(USER_PAGE_SIZE, ge=1, le=USER_PAGE_MAX_SIZE),
+    cursor: Optional[str] = None,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    locked: Optional[bool] = None,
+    q: Optional[str] = Query(None, min_length=1, max_length=100, description="Username or email prefix"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_admin_user)
+):
+    """
+    List users for the admin dashboard, newest first. Follow next_cursor for
+    further pages; the filters must stay the same between pages.
+    """
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+
+    # One extra row tells whether there is a next page
+    result = await execute_read(db, user_list_query(limit + 1, after, role, is_active, locked, q))
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return {
+        "users": rows,
+        "next_cursor": next_cursor
+    }
+
+@router.post("/users/bulk", response_model=UserBulkResult)
+async def provision_users(
+    batch: UserBulkCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_admin_user)
+):
+    """
+    Create many users at once, e.g. practice accounts for a workshop.
+    Passwords are hashed in parallel on the hashing pool and the users are
+    inserted with one multi-row INSERT; the batch is created entirely or not at all.
+    """
+    if len(batch.users) > PROVISION_MAX_USERS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many users: at most {PROVISION_MAX_USERS} per request"
+        )
+
+    # Duplicates within the batch, reported before any hashing
+    for column in ("username", "email"):
+        seen = set()
+        for user_create in batch.users:
+            value = getattr(user_create, column)
+            if value in seen:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Duplicate {column} in request: {value}"
+                )
+            seen.add(value)
+
+    start_time = time.perf_counter()
+    hashed_passwords = await hashing_pool.hash_many([user_create.password for user_create in batch.users])
+
+    rows = [
+        {
+            "username": user_create.username,
+            "email": user_create.email,
+            "full_name": user_create.full_name,
+            "role": user_create.role,
+            "_hashed_password": hashed_password,
+            "failed_login_attempts": 0,
+        }
+        for user_create, hashed_password in zip(batch.users, hashed_passwords)
+    ]
+    try:
+        result = await db.execute(insert(User).returning(User.id, User.username), rows)
+        created = [{"id": row.id, "username": row.username} for row in result]
+        await db.commit()
+    except IntegrityError as e:
+        column = unique_violation(e, ("username", "email"))
+        if column is None:
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{column.capitalize()} already registered"
+        )
+
+    seconds = time.perf_counter() - start_time
+    users_per_second = len(created) / seconds if seconds else 0.0
+    logger.info(f"Admin {current_user.id} provisioned {len(created)} users in {seconds:.2f}s "
+                f"({users_per_second:.1f} users/s)")
+
+    return {
+        "created": len(created),
+        "users": created,
+        "seconds": round(seconds, 4),
+        "users_per_second": round(users_per_second, 2)
+    }
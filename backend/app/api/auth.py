@@ -1,16 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Cookie
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
 from loguru import logger
 
-from ..db.session import get_db
-from ..models.user import User
+from ..db.session import execute_read, get_async_db, unique_violation, use_autocommit
+from ..db.queries import RECORD_FAILED_LOGIN, REVOKE_REFRESH_TOKEN, USER_BY_USERNAME
+from ..models.user import LOCKOUT_DURATION, MAX_FAILED_LOGIN_ATTEMPTS, User
 from ..models.token import Token as TokenModel
 from ..schemas.token import Token, RefreshToken
 from ..schemas.user import UserCreate, User as UserSchema, UserLogin
-from ..core.security import verify_token, create_access_token, create_refresh_token
+from ..core.security import verify_token, create_access_token, create_refresh_token, token_digest
+from ..core.hashing import hashing_pool
+from ..core.responses import token_response, user_response
+from ..core.revocation import publish_revocations, revocation_registry
 from ..middleware.rate_limiter import check_login_rate_limit
 from ..middleware.csrf import generate_csrf_token, CSRF_COOKIE_NAME
 
@@ -21,26 +26,49 @@ async def login(
     request: Request,
     response: Response,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    # Check rate limiting for login attempts
-    check_login_rate_limit(form_data.username)
+    # Check rate limiting for login attempts (usually already done with the IP check)
+    await check_login_rate_limit(request, form_data.username)
+    client_ip = request.client.host if request.client else "unknown"
     
-    # Get user from database
-    user = db.query(User).filter(User.username == form_data.username).first()
+    # Get user from database; a single read needs no transaction
+    await use_autocommit(db)
+    result = await execute_read(db, USER_BY_USERNAME, {"username": form_data.username})
+    user = result.scalar_one_or_none()
+    # Release the connection back to the pool while the password is hashed
+    # (expire_on_commit=False keeps the user loaded)
+    await db.commit()
     
-    # Check if user exists and password is correct
-    if not user or not user.verify_password(form_data.password):
+    # Check if account is locked; no need to spend a hash on it
+    if user and user.is_locked():
+        logger.warning(f"Login attempt on locked account: {user.username}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Account locked due to too many failed login attempts. Try again later.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    # Check if user exists and password is correct; an outdated hash comes back upgraded
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await hashing_pool.verify_and_update(form_data.password, user.hashed_password)
+    if not verified:
         # Record failed login attempt
         if user:
-            user.record_login_attempt(success=False)
-            db.commit()
+            # One atomic statement, so it needs no transaction either
+            await use_autocommit(db)
+            result = await db.execute(
+                RECORD_FAILED_LOGIN, {"user_id": user.id, "lock_until": datetime.now(timezone.utc) + LOCKOUT_DURATION}
+            )
+            failed_login_attempts = result.scalar_one()
+            await db.commit()
             
             # Check if account is now locked
-            if user.is_locked():
+            if failed_login_attempts >= MAX_FAILED_LOGIN_ATTEMPTS:
                 logger.warning(f"Account locked for user {user.username} due to too many failed login attempts")
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -55,15 +83,6 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Check if account is locked
-    if user.is_locked():
-        logger.warning(f"Login attempt on locked account: {user.username}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Account locked due to too many failed login attempts. Try again later.",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
     # Check if user is active
     if not user.is_active:
         logger.warning(f"Login attempt on inactive account: {user.username}")
@@ -73,21 +92,22 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Record successful login
-    user.record_login_attempt(success=True)
-    db.commit()
-    
     # Get client info for token
     user_agent = request.headers.get("User-Agent")
-    client_ip = request.client.host if request.client else "unknown"
     
-    # Create tokens
-    db_token = TokenModel.create_tokens(
+    # Record successful login (and any rehash) and create tokens in one transaction
+    user.record_login_attempt(success=True)
+    if new_hash is not None:
+        user.hashed_password = new_hash
+        logger.info(f"Rehashed password for user {user.id} with the current parameters")
+    db_token = await TokenModel.create_tokens(
         db=db,
         user_id=user.id,
         user_agent=user_agent,
-        ip_address=client_ip
+        ip_address=client_ip,
+        commit=False
     )
+    await db.commit()
     
     # Generate CSRF token
     csrf_response = await generate_csrf_token(request)
@@ -104,17 +124,13 @@ async def login(
     )
     
     # Return tokens
-    return {
-        "access_token": db_token.access_token,
-        "refresh_token": db_token.refresh_token,
-        "token_type": "bearer"
-    }
+    return token_response(db_token.access_token, db_token.refresh_token, response)
 
 @router.post("/refresh", response_model=Token)
 async def refresh_token(
     request: Request,
     refresh_token_data: RefreshToken,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Refresh access token
@@ -132,13 +148,12 @@ async def refresh_token(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Get token from database
-        db_token = db.query(TokenModel).filter(
-            TokenModel.refresh_token == refresh_token_data.refresh_token,
-            TokenModel.is_revoked == False
-        ).first()
+        # Revoke the presented token if it is still active; the UPDATE's row lock makes
+        # rotation exactly-once, a concurrent refresh with the same token finds it revoked
+        result = await db.execute(REVOKE_REFRESH_TOKEN, {"presented_hash": token_digest(refresh_token_data.refresh_token)})
+        old_token = result.one_or_none()
         
-        if not db_token:
+        if not old_token:
             logger.warning(f"Refresh token not found in database or revoked: {refresh_token_data.refresh_token[:10]}...")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -146,27 +161,28 @@ async def refresh_token(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Check if refresh token is expired
-        if db_token.is_refresh_token_expired:
-            logger.warning(f"Expired refresh token used: {refresh_token_data.refresh_token[:10]}...")
-            # Revoke the token
-            db_token.is_revoked = True
-            db.commit()
-            
+        if not old_token.user_is_active:
+            # Leave the token as it was
+            await db.rollback()
+            logger.warning(f"User not found or inactive: {old_token.user_id}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Refresh token expired",
+                detail="User not found or inactive",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Get user
-        user = db.query(User).filter(User.id == int(user_id)).first()
+        revoked = [(old_token.access_token_hash, old_token.access_token_expires_at)]
+        await publish_revocations(db, revoked)
         
-        if not user or not user.is_active:
-            logger.warning(f"User not found or inactive: {user_id}")
+        # Check if refresh token is expired; it stays revoked
+        if old_token.refresh_token_expired:
+            logger.warning(f"Expired refresh token used: {refresh_token_data.refresh_token[:10]}...")
+            await db.commit()
+            revocation_registry.add(*revoked[0])
+            
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found or inactive",
+                detail="Refresh token expired",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
@@ -174,24 +190,19 @@ async def refresh_token(
         user_agent = request.headers.get("User-Agent")
         client_ip = request.client.host if request.client else "unknown"
         
-        # Revoke old token
-        db_token.is_revoked = True
-        db.commit()
-        
-        # Create new tokens
-        new_db_token = TokenModel.create_tokens(
+        # Create new tokens in the same transaction as the revocation
+        new_db_token = await TokenModel.create_tokens(
             db=db,
-            user_id=user.id,
+            user_id=old_token.user_id,
             user_agent=user_agent,
-            ip_address=client_ip
+            ip_address=client_ip,
+            commit=False
         )
+        await db.commit()
+        revocation_registry.add(*revoked[0])
         
         # Return new tokens
-        return {
-            "access_token": new_db_token.access_token,
-            "refresh_token": new_db_token.refresh_token,
-            "token_type": "bearer"
-        }
+        return token_response(new_db_token.access_token, new_db_token.refresh_token)
         
     except HTTPException:
         raise
@@ -206,7 +217,7 @@ async def refresh_token(
 @router.post("/logout")
 async def logout(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     token: str = Cookie(None, alias="access_token")
 ):
     """
@@ -222,7 +233,7 @@ async def logout(
         
         if user_id:
             # Revoke all user tokens
-            TokenModel.revoke_all_user_tokens(db, int(user_id))
+            await TokenModel.revoke_all_user_tokens(db, int(user_id))
             logger.info(f"User {user_id} logged out, all tokens revoked")
         
         return {"message": "Successfully logged out"}
@@ -234,44 +245,38 @@ async def logout(
 @router.post("/register", response_model=UserSchema)
 async def register(
     user_create: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Register a new user
     """
-    # Check if username already exists
-    existing_user = db.query(User).filter(User.username == user_create.username).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
-    
-    # Check if email already exists
-    existing_email = db.query(User).filter(User.email == user_create.email).first()
-    if existing_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
+    # Hash first, off the event loop and before the session takes a connection
+    hashed_password = await hashing_pool.hash(user_create.password)
     
-    # Create new user
+    # One INSERT; the unique indexes decide duplicates, so concurrent registrations can't race
     user = User(
         username=user_create.username,
         email=user_create.email,
         full_name=user_create.full_name,
-        role=user_create.role
+        role=user_create.role,
+        hashed_password=hashed_password
     )
-    user.password = user_create.password  # This will hash the password
-    
-    # Add to database
+    await use_autocommit(db)
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        column = unique_violation(e, ("username", "email"))
+        if column is None:
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{column.capitalize()} already registered"
+        )
     
     logger.info(f"New user registered: {user.username}")
     
-    return user
+    return user_response(user)
 
 @router.get("/csrf-token")
 async def get_csrf_token(request: Request, response: Response):
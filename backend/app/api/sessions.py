@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from loguru import logger
+
+from ..db.session import execute_read, get_async_db
+from ..db.queries import ACTIVE_SESSIONS, REVOKE_SESSION
+from ..schemas.session import Session
+from ..core.security import get_current_user, oauth2_scheme, token_digest
+from ..core.token_cache import token_cache
+from ..core.revocation import publish_revocations, revocation_registry
+
+# Sessions returned by the listing, newest first
+SESSION_LIST_LIMIT = 100
+
+router = APIRouter(prefix="/sessions", tags=["sessions"])
+
+@router.get("", response_model=List[Session])
+async def list_sessions(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    List the current user's active sessions (signed-in devices)
+    """
+    result = await execute_read(db, ACTIVE_SESSIONS, {"user_id": current_user.id, "limit": SESSION_LIST_LIMIT})
+    current_hash = token_digest(token)
+
+    return [
+        {
+            "id": row.id,
+            "user_agent": row.user_agent,
+            "ip_address": row.ip_address,
+            "created_at": row.created_at,
+            "expires_at": row.refresh_token_expires_at,
+            "current": row.access_token_hash == current_hash
+        }
+        for row in result
+    ]
+
+@router.delete("/{session_id}")
+async def revoke_session(
+    session_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Revoke one of the current user's sessions, signing that device out
+    """
+    result = await db.execute(REVOKE_SESSION, {"session_id": session_id, "owner_id": current_user.id})
+    revoked = result.all()
+    if not revoked:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found"
+        )
+
+    # Tell the other workers once the revocation commits
+    await publish_revocations(db, revoked)
+    await db.commit()
+
+    access_token_hash, access_token_expires_at = revoked[0]
+    token_cache.invalidate_token(access_token_hash)
+    revocation_registry.add(access_token_hash, access_token_expires_at)
+    logger.info(f"User {current_user.id} revoked session {session_id}")
+
+    return {"message": "Session revoked"}
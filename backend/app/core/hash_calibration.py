@@ -0,0 +1,122 @@
+"""
+Pick Argon2 parameters for this host.
+
+    python -m app.core.hash_calibration --target-ms 250 --max-memory-mib 64
+
+Measures hashes on this machine with --concurrency of them running at once, as
+they do on the hashing pool under full login load, and picks parameters so that
+one hash takes about --target-ms:
+  - parallelism: the usable cores shared between the concurrent hashes
+  - memory: --max-memory-mib, halved while even one pass is over the target
+    (not below --min-memory-mib)
+  - time cost: as many passes as fit in the target
+Prints the settings as ARGON2_* environment variables. Existing hashes keep
+verifying after a change and are rehashed with the new parameters on each
+user's next successful login.
+"""
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from passlib.hash import argon2
+
+from .hashing import ARGON2_MEMORY_COST, ARGON2_PARALLELISM, ARGON2_TIME_COST, HASH_WORKERS
+
+# Stored hashes must fit the users.hashed_password column
+HASHED_PASSWORD_LENGTH = 100
+
+def usable_cores() -> int:
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+def physical_memory() -> Optional[int]:
+    """Bytes of RAM on this host, if known"""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def measure(time_cost: int, memory_cost: int, parallelism: int, concurrency: int, samples: int) -> Dict[str, float]:
+    """Median latency of one hash, and hashes per second, with `concurrency` hashes at once"""
+    hasher = argon2.using(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism,
+                          salt_len=16, digest_size=32)
+
+    def timed_hash(_) -> float:
+        start = time.perf_counter()
+        hasher.hash("calibration password")
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        latencies: List[float] = list(executor.map(timed_hash, range(concurrency * samples)))
+        elapsed = time.perf_counter() - start
+    return {
+        "latency_ms": round(statistics.median(latencies) * 1000, 1),
+        "hashes_per_s": round(len(latencies) / elapsed, 2),
+    }
+
+def calibrate(target_ms: float, max_memory_kib: int, min_memory_kib: int, parallelism: int,
+              concurrency: int, samples: int) -> Dict[str, float]:
+    """Largest memory, then most passes, that keep a hash within target_ms"""
+    memory_cost = max(max_memory_kib, 8 * parallelism)
+    result = measure(1, memory_cost, parallelism, concurrency, samples)
+    while result["latency_ms"] > target_ms and memory_cost // 2 >= max(min_memory_kib, 8 * parallelism):
+        memory_cost //= 2
+        result = measure(1, memory_cost, parallelism, concurrency, samples)
+
+    # Time is close to linear in the passes: estimate, then step back while over the target
+    time_cost = max(1, int(target_ms // result["latency_ms"]))
+    if time_cost > 1:
+        result = measure(time_cost, memory_cost, parallelism, concurrency, samples)
+        while result["latency_ms"] > target_ms and time_cost > 1:
+            time_cost -= 1
+            result = measure(time_cost, memory_cost, parallelism, concurrency, samples)
+
+    return dict(result, time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=250, help="hash latency to aim for under full load")
+    parser.add_argument("--max-memory-mib", type=int, default=64, help="memory budget per hash")
+    parser.add_argument("--min-memory-mib", type=int, default=19, help="never go below this much memory per hash")
+    parser.add_argument("--concurrency", type=int, default=HASH_WORKERS,
+                        help="hashes running at once (HASH_WORKERS per server process)")
+    parser.add_argument("--parallelism", type=int, help="lanes per hash; default: usable cores / concurrency")
+    parser.add_argument("--samples", type=int, default=3, help="hashes per concurrent slot and measurement")
+    args = parser.parse_args()
+
+    cores = usable_cores()
+    parallelism = args.parallelism or max(1, cores // args.concurrency)
+    print(f"{cores} usable cores, {args.concurrency} concurrent hashes, target {args.target_ms} ms")
+
+    current = measure(ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM, args.concurrency, args.samples)
+    print(f"current:    time_cost={ARGON2_TIME_COST} memory_cost={ARGON2_MEMORY_COST}KiB "
+          f"parallelism={ARGON2_PARALLELISM}  {current['latency_ms']} ms  {current['hashes_per_s']} hashes/s")
+
+    chosen = calibrate(args.target_ms, args.max_memory_mib * 1024, args.min_memory_mib * 1024, parallelism,
+                       args.concurrency, args.samples)
+    print(f"calibrated: time_cost={chosen['time_cost']} memory_cost={chosen['memory_cost']}KiB "
+          f"parallelism={chosen['parallelism']}  {chosen['latency_ms']} ms  {chosen['hashes_per_s']} hashes/s")
+
+    if chosen["latency_ms"] > args.target_ms:
+        print(f"warning: even the cheapest setting allowed takes {chosen['latency_ms']} ms; "
+              f"lower --concurrency or --min-memory-mib, or accept the latency")
+    in_use = chosen["memory_cost"] * 1024 * args.concurrency
+    ram = physical_memory()
+    if ram and in_use > ram // 2:
+        print(f"warning: {args.concurrency} concurrent hashes use {in_use // 2**20} MiB, "
+              f"over half of this host's {ram // 2**20} MiB per server process")
+    sample = argon2.using(time_cost=chosen["time_cost"], memory_cost=chosen["memory_cost"],
+                          parallelism=chosen["parallelism"], salt_len=16, digest_size=32).hash("x")
+    if len(sample) > HASHED_PASSWORD_LENGTH:
+        print(f"warning: hashes are {len(sample)} characters, longer than the hashed_password column")
+
+    print()
+    print(f"ARGON2_TIME_COST={chosen['time_cost']}")
+    print(f"ARGON2_MEMORY_COST={chosen['memory_cost']}")
+    print(f"ARGON2_PARALLELISM={chosen['parallelism']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, status
+from loguru import logger
+from passlib.context import CryptContext
+from .metrics import metrics_registry, password_hash_duration
+
+# Hashing pool settings
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", min(4, os.cpu_count() or 1)))  # concurrent Argon2 computations
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", 32))  # hashes allowed to wait for a worker
+HASH_QUEUE_TIMEOUT = float(os.getenv("HASH_QUEUE_TIMEOUT", 5))  # seconds a hash may wait for a worker
+
+# Argon2 parameters; pick them per host with `python -m app.core.hash_calibration`
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 4))  # passes over memory
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 65536))  # KiB per hash
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 8))  # lanes (threads) per hash
+
+# New hashes use Argon2 with the parameters above. Hashes made with other
+# parameters, or with bcrypt, still verify and are rehashed on the next login
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+    argon2__salt_len=16,
+    argon2__digest_size=32,
+)
+
+# Timing histograms, resolved once instead of per call
+_hash_timing = password_hash_duration.labels("hash")
+_verify_timing = password_hash_duration.labels("verify")
+
+def hash_password(password: str) -> str:
+    """Hash a password with Argon2 (blocking)"""
+    start_time = time.perf_counter()
+    try:
+        return pwd_context.hash(password)
+    finally:
+        _hash_timing.observe(time.perf_counter() - start_time)
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    """Verify a password against a stored hash (blocking)"""
+    start_time = time.perf_counter()
+    try:
+        return pwd_context.verify(password, hashed_password)
+    finally:
+        _verify_timing.observe(time.perf_counter() - start_time)
+
+def verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password (blocking); on success also return a new hash if the stored one is outdated"""
+    start_time = time.perf_counter()
+    try:
+        return pwd_context.verify_and_update(password, hashed_password)
+    finally:
+        _verify_timing.observe(time.perf_counter() - start_time)
+
+class HashingPool:
+    """
+    Bounded worker pool for password hashing.
+
+    Argon2 is CPU and memory heavy, so hashes run on a dedicated thread pool
+    (argon2-cffi releases the GIL) instead of the event loop. At most `workers`
+    hashes run at once and at most `queue_size` wait for a slot; anything beyond
+    that, or anything that waits longer than `queue_timeout`, is rejected with a 503.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, queue_size: int = HASH_QUEUE_SIZE,
+                 queue_timeout: float = HASH_QUEUE_TIMEOUT):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+
+        # Created lazily so they bind to the running event loop (and survive a fork)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        # Metrics
+        self.waiting = 0
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.rehashed = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+        logger.info(f"Hashing pool initialized with workers={workers}, queue_size={queue_size}, queue_timeout={queue_timeout}s, "
+                    f"argon2 time_cost={ARGON2_TIME_COST}, memory_cost={ARGON2_MEMORY_COST}KiB, parallelism={ARGON2_PARALLELISM}")
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="argon2")
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        return self._slots
+
+    def _busy(self, reason: str) -> HTTPException:
+        logger.warning(f"Hashing pool {reason} (waiting={self.waiting}, active={self.active})")
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy. Please try again later.",
+            headers={"Retry-After": "1"},
+        )
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking hashing function on the pool"""
+        slots = self._get_slots()
+        if not slots.locked():
+            # A worker is free, take it without queueing
+            await slots.acquire()
+        else:
+            if self.waiting >= self.queue_size:
+                self.rejected += 1
+                raise self._busy("queue full")
+
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(slots.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise self._busy("queue timeout")
+            finally:
+                self.waiting -= 1
+
+        self.active += 1
+        start_time = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            self.active -= 1
+            self.completed += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+            slots.release()
+
+    async def hash(self, password: str) -> str:
+        """Hash a password on the pool"""
+        return await self.run(hash_password, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Verify a password on the pool"""
+        return await self.run(verify_password, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password on the pool, returning a replacement hash if the stored one is outdated"""
+        verified, new_hash = await self.run(verify_and_update, password, hashed_password)
+        if new_hash is not None:
+            self.rehashed += 1
+        return verified, new_hash
+
+    async def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """
+        Hash many passwords on the pool, in input order. At most `workers` of
+        them are running or queued at a time, so requests arriving meanwhile
+        wait behind a few of them rather than behind the whole batch.
+        """
+        window = asyncio.Semaphore(self.workers)
+
+        async def hash_one(password: str) -> str:
+            async with window:
+                return await self.hash(password)
+
+        return await asyncio.gather(*(hash_one(password) for password in passwords))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and hash latency metrics"""
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "waiting": self.waiting,
+            "active": self.active,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "rehashed": self.rehashed,
+            "avg_hash_seconds": self.total_seconds / self.completed if self.completed else 0.0,
+            "max_hash_seconds": self.max_seconds,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+# Create a global hashing pool instance
+hashing_pool = HashingPool()
+
+# Expose the pool's queue state as gauges
+metrics_registry.collector(
+    "password_hash_pool_waiting", "Hashes waiting for a worker", "gauge",
+    lambda: [("password_hash_pool_waiting", {}, hashing_pool.waiting)])
+metrics_registry.collector(
+    "password_hash_pool_rejected_total", "Hashes rejected with a 503 because the pool was saturated", "counter",
+    lambda: [("password_hash_pool_rejected_total", {}, hashing_pool.rejected + hashing_pool.timed_out)])
@@ -0,0 +1,129 @@
+import json
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from loguru import logger
+
+# Logging settings
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FILE = os.getenv("LOG_FILE", "logs/app.log")
+ACCESS_LOG = os.getenv("ACCESS_LOG", "true").lower() in ("1", "true", "yes")
+ACCESS_LOG_FILE = os.getenv("ACCESS_LOG_FILE", "logs/access.log")
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", 1.0))  # share of 2xx responses logged; errors always are
+ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", 10000))  # records waiting to be written before new ones are dropped
+
+# Logger for access records; they only go to the access sink
+access_logger = logger.bind(access=True)
+
+def _is_app_record(record) -> bool:
+    return "access" not in record["extra"]
+
+def _is_access_record(record) -> bool:
+    return "access" in record["extra"]
+
+class AccessLogWriter:
+    """
+    Writes access records from a dedicated thread.
+
+    The request path only puts a dict on a bounded in-process queue; JSON encoding
+    happens on the writer thread, which then hands the line to the enqueued access
+    sink. That second hop costs the writer thread, not the request, and it is what
+    keeps the file with a single owner when workers are forked (see setup_logging).
+    When the queue is full, records are dropped and counted rather than slowing
+    requests.
+    """
+
+    def __init__(self, max_queue: int = ACCESS_LOG_QUEUE_SIZE):
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.written = 0
+        self.dropped = 0
+
+    def submit(self, record: Dict[str, Any]) -> None:
+        """Queue a record for writing"""
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="access-log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            record["ts"] = datetime.fromtimestamp(record["ts"], timezone.utc).isoformat()
+            access_logger.info(json.dumps(record, separators=(",", ":")))
+            self.written += 1
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write out queued records and stop the thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": self._queue.qsize(), "written": self.written, "dropped": self.dropped}
+
+# Create a global access log writer instance
+access_log_writer = AccessLogWriter()
+
+def setup_logging(stream=sys.stdout, log_file: str = LOG_FILE, access_log_file: str = ACCESS_LOG_FILE) -> None:
+    """
+    Configure the application and access log sinks.
+
+    Sinks are enqueued, so formatting aside, writes, rotation and compression run
+    on loguru's worker thread; call logger.complete() on shutdown to flush them.
+    Processes forked after this (gunicorn workers with PRELOAD) send their records
+    to that thread too, so one process owns and rotates each file. Access records
+    take two hops: the request puts them on access_log_writer's queue, and its
+    thread passes the encoded line to the sink's queue.
+    """
+    logger.remove()
+    logger.add(
+        stream,
+        colorize=True,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level=LOG_LEVEL,
+        filter=_is_app_record,
+        enqueue=True,
+    )
+    logger.add(
+        log_file,
+        rotation="10 MB",
+        retention="30 days",
+        compression="zip",
+        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
+        level=LOG_LEVEL,
+        filter=_is_app_record,
+        enqueue=True,
+    )
+
+    # One JSON object per line, handed over by the access log writer thread; enqueued
+    # like the others so forked workers don't each rotate the same file
+    if ACCESS_LOG:
+        logger.add(
+            access_log_file,
+            rotation="50 MB",
+            retention="30 days",
+            compression="zip",
+            format="{message}",
+            level="INFO",
+            filter=_is_access_record,
+            enqueue=True,
+        )
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from ..db.session import async_engine
+
+# Readiness settings
+READY_CACHE_TTL = float(os.getenv("READY_CACHE_TTL", 2))  # seconds a database probe result is reused
+READY_PROBE_TIMEOUT = float(os.getenv("READY_PROBE_TIMEOUT", 1))  # seconds before the probe counts as failed
+READY_POOL_SATURATION = float(os.getenv("READY_POOL_SATURATION", 1.0))  # share of pool capacity in use that counts as saturated
+
+def pool_status(pool) -> Dict[str, Any]:
+    """Return usage of a connection pool; pools that don't track usage report only their class"""
+    status: Dict[str, Any] = {"class": type(pool).__name__}
+    if hasattr(pool, "checkedout"):
+        size = pool.size()
+        max_overflow = max(getattr(pool, "_max_overflow", 0), 0)
+        checked_out = pool.checkedout()
+        status.update({
+            "size": size,
+            "max_overflow": max_overflow,
+            "checked_out": checked_out,
+            "overflow": pool.overflow(),
+            "capacity": size + max_overflow,
+            "utilization": round(checked_out / (size + max_overflow), 3) if size + max_overflow else 0.0,
+        })
+    return status
+
+class ReadinessProbe:
+    """
+    Database readiness with a cached probe.
+
+    Each probe checks a connection out of the app's pool and runs SELECT 1,
+    recording how long the checkout waited. The result is reused for `ttl`
+    seconds and concurrent callers share one probe, so frequent health checks
+    add at most one query per TTL. Pool usage is read live on every call.
+    While the pool is saturated no probe is run; the status is "degraded" so
+    the orchestrator sheds traffic from this worker.
+    """
+
+    def __init__(self, engine: AsyncEngine = async_engine, ttl: float = READY_CACHE_TTL,
+                 timeout: float = READY_PROBE_TIMEOUT, saturation: float = READY_POOL_SATURATION):
+        self.engine = engine
+        self.ttl = ttl
+        self.timeout = timeout
+        self.saturation = saturation
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+        # Metrics
+        self.probes = 0
+        self.failures = 0
+
+    async def _probe(self) -> Dict[str, Any]:
+        self.probes += 1
+        start_time = time.perf_counter()
+        checkout_ms = 0.0
+
+        async def select_one():
+            nonlocal checkout_ms
+            async with self.engine.connect() as conn:
+                checkout_ms = (time.perf_counter() - start_time) * 1000
+                await conn.execute(text("SELECT 1"))
+
+        try:
+            await asyncio.wait_for(select_one(), self.timeout)
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"Database readiness probe failed: {e!r}")
+            return {"reachable": False, "error": type(e).__name__}
+
+        return {
+            "reachable": True,
+            "checkout_wait_ms": round(checkout_ms, 3),
+            "latency_ms": round((time.perf_counter() - start_time) * 1000, 3),
+        }
+
+    async def database(self) -> Dict[str, Any]:
+        """Return the cached probe result, probing again once it is older than the TTL"""
+        if self._result is not None and time.monotonic() - self._checked_at < self.ttl:
+            return self._result
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Another caller may have refreshed it while we waited
+            if self._result is None or time.monotonic() - self._checked_at >= self.ttl:
+                self._result = await self._probe()
+                self._checked_at = time.monotonic()
+        return self._result
+
+    async def check(self) -> Dict[str, Any]:
+        """Return the overall status ("ok", "degraded" or "unavailable") with its details"""
+        pool = pool_status(self.engine.pool)
+        saturated = pool.get("utilization", 0.0) >= self.saturation
+
+        if saturated:
+            # Don't queue a probe behind the requests already waiting for a connection
+            database = {**(self._result or {}), "skipped": "pool saturated"}
+            status = "degraded"
+        else:
+            database = await self.database()
+            status = "ok" if database["reachable"] else "unavailable"
+
+        return {
+            "status": status,
+            "database": {**database, "age_s": round(time.monotonic() - self._checked_at, 3) if self._checked_at else None},
+            "pool": pool,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "probes": self.probes,
+            "failures": self.failures,
+            "last_result": self._result,
+        }
+
+# Create a global readiness probe instance
+readiness_probe = ReadinessProbe()
@@ -0,0 +1,47 @@
+import os
+from typing import Any, Optional
+from fastapi import Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from ..schemas.user import User as UserSchema
+
+# Fast JSON mode: orjson encoding and prebuilt responses for the hot endpoints
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() in ("1", "true", "yes")
+
+# Default response class for the app
+DefaultResponse = ORJSONResponse if FAST_JSON else JSONResponse
+
+# Fields of the user response, in schema order
+USER_FIELDS = tuple(UserSchema.__fields__)
+
+def json_response(content: Any, response: Optional[Response] = None) -> Any:
+    """
+    Return content for a handler to send.
+
+    With FAST_JSON the content goes straight into an ORJSONResponse, which
+    skips FastAPI's response_model validation and jsonable_encoder pass, so it
+    must already match the response model. Cookies and headers set on the
+    handler's injected `response` are carried over, as FastAPI does for
+    returned dicts. Without FAST_JSON the content is returned unchanged.
+    """
+    if not FAST_JSON:
+        return content
+    fast_response = ORJSONResponse(content)
+    if response is not None:
+        if response.status_code:
+            fast_response.status_code = response.status_code
+        fast_response.headers.raw.extend(response.headers.raw)
+    return fast_response
+
+def token_response(access_token: str, refresh_token: str, response: Optional[Response] = None) -> Any:
+    """Token pair response matching schemas.token.Token"""
+    return json_response({
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer"
+    }, response)
+
+def user_response(user: Any) -> Any:
+    """User response matching schemas.user.User, built from the loaded model"""
+    if not FAST_JSON:
+        return user
+    return json_response({field: getattr(user, field) for field in USER_FIELDS})
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+import asyncpg
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from ..db.session import ASYNC_DATABASE_URL
+from .token_cache import token_cache
+
+# Revocation broadcast settings
+REVOCATION_BROADCAST = os.getenv("REVOCATION_BROADCAST", "false").lower() in ("1", "true", "yes")
+REVOCATION_CHANNEL = os.getenv("REVOCATION_CHANNEL", "token_revocations")
+REVOCATION_PING_INTERVAL = float(os.getenv("REVOCATION_PING_INTERVAL", 5))  # seconds between liveness checks
+REVOCATION_RECONNECT_DELAY = float(os.getenv("REVOCATION_RECONNECT_DELAY", 5))  # seconds before reconnecting
+
+# NOTIFY payloads are limited to 8000 bytes; each revoked token takes ~45
+NOTIFY_BATCH_SIZE = 100
+
+# Revoked access tokens that haven't expired yet, the state a worker needs after (re)connecting
+RESYNC_QUERY = (
+    "SELECT access_token_hash, access_token_expires_at FROM app_schema.tokens "
+    "WHERE is_revoked AND access_token_expires_at > now()"
+)
+
+def _timestamp(value: Any) -> float:
+    return value.timestamp() if isinstance(value, datetime) else float(value)
+
+async def publish_revocations(db, revoked: Iterable[Tuple[bytes, Any]]) -> None:
+    """
+    Queue NOTIFY messages for revoked access tokens on the session's transaction.
+
+    `revoked` holds (access_token_hash, access_token_expires_at) pairs. NOTIFY is
+    transactional, so workers only hear about revocations that were committed.
+    """
+    if not REVOCATION_BROADCAST:
+        return
+
+    now = time.time()
+    entries = [[digest.hex(), int(_timestamp(expires_at))] for digest, expires_at in revoked]
+    entries = [entry for entry in entries if entry[1] > now]
+    for i in range(0, len(entries), NOTIFY_BATCH_SIZE):
+        payload = json.dumps({"tokens": entries[i:i + NOTIFY_BATCH_SIZE]}, separators=(",", ":"))
+        await db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": REVOCATION_CHANNEL, "payload": payload})
+
+class RevocationRegistry:
+    """
+    Per-worker set of revoked, unexpired access tokens kept current over Postgres LISTEN/NOTIFY.
+
+    While the listener is connected and synced (`ready`), get_current_user answers the
+    revocation check from memory instead of querying the tokens table. Entries are pruned
+    once the token itself has expired. On every (re)connect the worker starts listening
+    first and then reloads the revoked set from the database, so nothing published while
+    it was disconnected is missed.
+
+    `ready` drops as soon as the connection closes, and also when the last successful
+    ping is older than two ping intervals (a connection that silently stopped
+    delivering), so callers fall back to the database for the whole outage.
+    """
+
+    def __init__(self, enabled: bool = REVOCATION_BROADCAST, channel: str = REVOCATION_CHANNEL):
+        self.enabled = enabled
+        self.channel = channel
+        self._synced = False
+        self._last_ping = 0.0
+        self._lost: Optional[asyncio.Event] = None
+        self._revoked: Dict[bytes, float] = {}  # access token digest -> exp timestamp
+        self._conn: Optional[asyncpg.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.notifications = 0
+        self.resyncs = 0
+        self.reconnects = 0
+
+    @property
+    def ready(self) -> bool:
+        """Whether the in-memory set is current enough to answer revocation checks"""
+        # A ping is due every interval and may take up to another one
+        return self._synced and time.monotonic() - self._last_ping < 2 * REVOCATION_PING_INTERVAL
+
+    def is_revoked(self, access_token_hash: bytes) -> bool:
+        """Check the in-memory revoked set"""
+        expires_at = self._revoked.get(access_token_hash)
+        return expires_at is not None and expires_at > time.time()
+
+    def add(self, access_token_hash: bytes, expires_at: Any) -> None:
+        """Record a revoked token and drop it from the token cache"""
+        expires_at = _timestamp(expires_at)
+        if self.enabled and expires_at > time.time():
+            self._revoked[access_token_hash] = expires_at
+        token_cache.invalidate_token(access_token_hash)
+
+    def prune(self) -> None:
+        """Forget tokens that have expired on their own"""
+        now = time.time()
+        for digest in [digest for digest, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[digest]
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            message = json.loads(payload)
+            for digest_hex, expires_at in message.get("tokens", ()):
+                self.add(bytes.fromhex(digest_hex), expires_at)
+            self.notifications += 1
+        except (ValueError, TypeError) as e:
+            logger.error(f"Invalid revocation notification: {e}")
+
+    def _on_terminate(self, connection) -> None:
+        # Called by asyncpg as soon as the connection closes, well before the next ping
+        self._unsync()
+        if self._lost is not None:
+            self._lost.set()
+
+    def _unsync(self) -> None:
+        # Fall back to database checks; tokens cached as valid may have been revoked
+        # by another worker while notifications weren't arriving
+        if self._synced:
+            token_cache.clear()
+        self._synced = False
+
+    async def _resync(self, conn: asyncpg.Connection) -> None:
+        # Revocations are permanent, so entries already held (including ones notified
+        # while this query runs) stay; the snapshot only fills in what was missed
+        rows = await conn.fetch(RESYNC_QUERY)
+        for row in rows:
+            self.add(bytes(row["access_token_hash"]), row["access_token_expires_at"])
+        self.resyncs += 1
+        logger.info(f"Revocation set synced with {len(self._revoked)} revoked tokens")
+
+    async def _listen(self) -> None:
+        dsn = make_url(ASYNC_DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            try:
+                self._lost = asyncio.Event()
+                self._conn = await asyncpg.connect(dsn)
+                self._conn.add_termination_listener(self._on_terminate)
+                # Listen before loading the snapshot so nothing falls in between
+                await self._conn.add_listener(self.channel, self._on_notify)
+                await self._resync(self._conn)
+                self._last_ping = time.monotonic()
+                self._synced = True
+
+                while True:
+                    try:
+                        await asyncio.wait_for(self._lost.wait(), timeout=REVOCATION_PING_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    else:
+                        raise ConnectionError("connection closed")
+                    await asyncio.wait_for(self._conn.execute("SELECT 1"), timeout=REVOCATION_PING_INTERVAL)
+                    self._last_ping = time.monotonic()
+                    self.prune()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Revocation listener disconnected: {e}")
+            finally:
+                # Fall back to database checks until resynced
+                self._unsync()
+                if self._conn is not None and not self._conn.is_closed():
+                    await self._conn.close()
+                self._conn = None
+
+            self.reconnects += 1
+            await asyncio.sleep(REVOCATION_RECONNECT_DELAY)
+
+    async def start(self) -> None:
+        """Start the listener task"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._listen())
+            logger.info(f"Revocation listener started on channel {self.channel}")
+
+    async def stop(self) -> None:
+        """Stop the listener task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return listener state and counters"""
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "revoked_tokens": len(self._revoked),
+            "notifications": self.notifications,
+            "resyncs": self.resyncs,
+            "reconnects": self.reconnects,
+        }
+
+# Create a global revocation registry instance
+revocation_registry = RevocationRegistry()
@@ -0,0 +1,305 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+import bleach
+from fastapi import HTTPException, status
+from loguru import logger
+
+# Sanitizer cache settings
+SANITIZE_CACHE_SIZE = int(os.getenv("SANITIZE_CACHE_SIZE", 1024))  # max cached documents per process, 0 disables
+SANITIZE_CACHE_MAX_BYTES = int(os.getenv("SANITIZE_CACHE_MAX_BYTES", 32 * 1024 * 1024))  # total cached output
+
+# Sanitizer pool settings
+SANITIZE_THREADS = int(os.getenv("SANITIZE_THREADS", 2))  # threads for small requests
+SANITIZE_PROCESSES = int(os.getenv("SANITIZE_PROCESSES", min(4, os.cpu_count() or 1)))  # 0 keeps everything on threads
+SANITIZE_PROCESS_MIN_BYTES = int(os.getenv("SANITIZE_PROCESS_MIN_BYTES", 64 * 1024))  # uncached input that goes to processes
+SANITIZE_MAX_FRAGMENTS = int(os.getenv("SANITIZE_MAX_FRAGMENTS", 500))  # per batch request
+SANITIZE_MAX_BYTES = int(os.getenv("SANITIZE_MAX_BYTES", 2 * 1024 * 1024))  # total input per request
+
+class SanitizerPolicy(NamedTuple):
+    tags: FrozenSet[str]
+    attributes: Mapping[str, Sequence[str]]
+    protocols: FrozenSet[str] = frozenset(bleach.sanitizer.ALLOWED_PROTOCOLS)
+    strip: bool = True
+
+# Allowed markup for user content (blog posts, editor documents)
+DEFAULT_POLICY = SanitizerPolicy(
+    tags=frozenset([
+        'p', 'b', 'i', 'u', 'em', 'strong', 'a', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+        'ul', 'ol', 'li', 'br', 'hr', 'pre', 'code', 'blockquote', 'img',
+    ]),
+    attributes={
+        'a': ['href', 'title', 'target'],
+        'img': ['src', 'alt', 'title', 'width', 'height'],
+    },
+)
+
+POLICIES: Dict[str, SanitizerPolicy] = {"default": DEFAULT_POLICY}
+
+def content_digest(content: str) -> bytes:
+    """Cache key for a document"""
+    return hashlib.blake2b(content.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+class HTMLSanitizer:
+    """
+    Sanitizes HTML with one bleach.Cleaner per policy and a cache of results.
+
+    Building a Cleaner sets up its html5lib parser, tree walker and serializer,
+    which bleach.clean() does on every call. A Cleaner keeps parse state while
+    it runs, so each thread gets its own per policy and they are reused from
+    then on. Results are cached in an LRU keyed by policy and a digest of the
+    input, bounded by entry count and by total output size. Documents larger
+    than a quarter of the byte budget aren't cached.
+    """
+
+    def __init__(self, policies: Mapping[str, SanitizerPolicy] = POLICIES,
+                 max_size: int = SANITIZE_CACHE_SIZE, max_bytes: int = SANITIZE_CACHE_MAX_BYTES):
+        self.policies = dict(policies)
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._entries: "OrderedDict[Tuple[str, bytes], str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.cleaners = 0
+
+        logger.info(f"HTML sanitizer initialized with policies={sorted(self.policies)}, "
+                    f"cache max_size={max_size}, max_bytes={max_bytes}")
+
+    def _cleaner(self, policy_name: str) -> bleach.Cleaner:
+        cleaners = getattr(self._local, "cleaners", None)
+        if cleaners is None:
+            cleaners = self._local.cleaners = {}
+        cleaner = cleaners.get(policy_name)
+        if cleaner is None:
+            policy = self.policies[policy_name]
+            cleaner = cleaners[policy_name] = bleach.Cleaner(
+                tags=policy.tags, attributes=dict(policy.attributes), protocols=policy.protocols, strip=policy.strip,
+            )
+            with self._lock:
+                self.cleaners += 1
+        return cleaner
+
+    def clean(self, content: str, policy: str = "default") -> str:
+        """Return the sanitized document, from the cache when the same input was seen before"""
+        if policy not in self.policies:
+            raise KeyError(f"Unknown sanitizer policy: {policy}")
+        if self.max_size <= 0:
+            return self._cleaner(policy).clean(content)
+
+        key, cached = self.lookup(content, policy)
+        if cached is not None:
+            return cached
+
+        sanitized = self._cleaner(policy).clean(content)
+        self.store(key, sanitized)
+        return sanitized
+
+    def store(self, key: Tuple[str, bytes], sanitized: str) -> None:
+        size = len(sanitized)
+        if self.max_size <= 0 or size > self.max_bytes // 4:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = sanitized
+            self._bytes += size
+
+            # Evict least recently used entries
+            while len(self._entries) > self.max_size or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def lookup(self, content: str, policy: str = "default") -> Tuple[Tuple[str, bytes], Optional[str]]:
+        """Return the cache key for a document and its cached result, if any"""
+        key = (policy, content_digest(content))
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        return key, cached
+
+    def clean_uncached(self, content: str, policy: str = "default") -> str:
+        """Sanitize without consulting or filling the cache"""
+        return self._cleaner(policy).clean(content)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "bytes": self._bytes,
+            "max_size": self.max_size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "cleaners": self.cleaners,
+        }
+
+# Create a global HTML sanitizer instance
+html_sanitizer = HTMLSanitizer()
+
+def _clean_chunk(policy: str, fragments: List[str]) -> List[str]:
+    # Runs in a pool process, which has its own html_sanitizer
+    return [html_sanitizer.clean_uncached(fragment, policy) for fragment in fragments]
+
+def _split(items: List[Tuple[int, str]], parts: int) -> List[List[Tuple[int, str]]]:
+    # Largest first onto the lightest chunk, so chunks get similar amounts of input
+    chunks: List[List[Tuple[int, str]]] = [[] for _ in range(min(parts, len(items)))]
+    sizes = [0] * len(chunks)
+    for item in sorted(items, key=lambda item: len(item[1]), reverse=True):
+        lightest = sizes.index(min(sizes))
+        chunks[lightest].append(item)
+        sizes[lightest] += len(item[1])
+    return chunks
+
+class SanitizePool:
+    """
+    Runs sanitization off the event loop.
+
+    bleach is pure Python and holds the GIL, so a large document on the
+    event loop stalls every other request in the worker. Cache hits are
+    answered inline. Other requests run on a small thread pool, which keeps
+    the loop responsive between GIL switches. Requests whose uncached input
+    reaches `process_min_bytes` are split across a process pool instead, so
+    they run in parallel without holding this process's GIL. Results come
+    back in input order and are added to the cache.
+    """
+
+    def __init__(self, sanitizer: HTMLSanitizer = html_sanitizer, threads: int = SANITIZE_THREADS,
+                 processes: int = SANITIZE_PROCESSES, process_min_bytes: int = SANITIZE_PROCESS_MIN_BYTES,
+                 max_fragments: int = SANITIZE_MAX_FRAGMENTS, max_bytes: int = SANITIZE_MAX_BYTES):
+        self.sanitizer = sanitizer
+        self.threads = threads
+        self.processes = processes
+        self.process_min_bytes = process_min_bytes
+        self.max_fragments = max_fragments
+        self.max_bytes = max_bytes
+
+        # Created lazily on first use
+        self._thread_executor: Optional[ThreadPoolExecutor] = None
+        self._process_executor: Optional[ProcessPoolExecutor] = None
+
+        # Metrics
+        self.requests = 0
+        self.fragments = 0
+        self.thread_jobs = 0
+        self.process_jobs = 0
+        self.rejected = 0
+
+    def _get_thread_executor(self) -> ThreadPoolExecutor:
+        if self._thread_executor is None:
+            self._thread_executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="sanitize")
+        return self._thread_executor
+
+    def _get_process_executor(self) -> ProcessPoolExecutor:
+        if self._process_executor is None:
+            # Spawned, not forked: the parent runs logging and database threads
+            self._process_executor = ProcessPoolExecutor(
+                max_workers=self.processes, mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._process_executor
+
+    def check_limits(self, fragments: Sequence[str]) -> None:
+        """Reject a request over the fragment count or total size limit with a 413"""
+        detail = None
+        if len(fragments) > self.max_fragments:
+            detail = f"Too many fragments: at most {self.max_fragments} per request"
+        elif sum(len(fragment) for fragment in fragments) > self.max_bytes:
+            detail = f"Content too large: at most {self.max_bytes} characters per request"
+        if detail is not None:
+            self.rejected += 1
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+    async def clean_many(self, fragments: Sequence[str], policy: str = "default") -> List[str]:
+        """Sanitize fragments off the event loop; results are in input order"""
+        if policy not in self.sanitizer.policies:
+            raise KeyError(f"Unknown sanitizer policy: {policy}")
+        self.check_limits(fragments)
+        self.requests += 1
+        self.fragments += len(fragments)
+
+        results: List[Optional[str]] = [None] * len(fragments)
+        keys: Dict[int, Tuple[str, bytes]] = {}
+        misses: List[Tuple[int, str]] = []
+        for i, fragment in enumerate(fragments):
+            key, cached = self.sanitizer.lookup(fragment, policy)
+            if cached is not None:
+                results[i] = cached
+            else:
+                keys[i] = key
+                misses.append((i, fragment))
+
+        if misses:
+            loop = asyncio.get_running_loop()
+            if self.processes > 0 and sum(len(fragment) for _, fragment in misses) >= self.process_min_bytes:
+                chunks = _split(misses, self.processes)
+                self.process_jobs += len(chunks)
+                executor = self._get_process_executor()
+                outputs = await asyncio.gather(*(
+                    loop.run_in_executor(executor, _clean_chunk, policy, [fragment for _, fragment in chunk])
+                    for chunk in chunks
+                ))
+                cleaned = [(i, output) for chunk, chunk_outputs in zip(chunks, outputs)
+                           for (i, _), output in zip(chunk, chunk_outputs)]
+            else:
+                self.thread_jobs += 1
+                outputs = await loop.run_in_executor(
+                    self._get_thread_executor(), _clean_chunk, policy, [fragment for _, fragment in misses],
+                )
+                cleaned = [(i, output) for (i, _), output in zip(misses, outputs)]
+
+            for i, output in cleaned:
+                results[i] = output
+                self.sanitizer.store(keys[i], output)
+
+        return results
+
+    async def clean(self, content: str, policy: str = "default") -> str:
+        """Sanitize one document off the event loop"""
+        return (await self.clean_many([content], policy))[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request and job counters"""
+        return {
+            "threads": self.threads,
+            "processes": self.processes,
+            "requests": self.requests,
+            "fragments": self.fragments,
+            "thread_jobs": self.thread_jobs,
+            "process_jobs": self.process_jobs,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker threads and processes"""
+        if self._thread_executor is not None:
+            self._thread_executor.shutdown(wait=False)
+            self._thread_executor = None
+        if self._process_executor is not None:
+            self._process_executor.shutdown(wait=False, cancel_futures=True)
+            self._process_executor = None
+
+# Create a global sanitizer pool instance
+sanitize_pool = SanitizePool()
@@ -2,14 +2,19 @@ from datetime import datetime, timedelta
 from typing import Any, Dict, Optional, Union
 import os
 import secrets
+import hashlib
+import ipaddress
 import jwt
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from loguru import logger
-from ..db.session import get_db
-from sqlalchemy.orm import Session
-import bleach
+from ..db.session import execute_read, get_async_db
+from ..schemas.user import User as UserSchema
+from .hashing import pwd_context  # password hashing context, re-exported
+from .token_cache import token_cache
+from .revocation import revocation_registry
+from .sanitizer import html_sanitizer
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Load environment variables
 SECRET_KEY = os.getenv("SECRET_KEY", secrets.token_hex(32))
@@ -17,18 +22,27 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
 
-# Password hashing
-pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
+# Addresses or networks allowed to scrape /metrics, comma-separated
+METRICS_ALLOWED_IPS = os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1")
+METRICS_NETWORKS = [ipaddress.ip_network(value.strip(), strict=False)
+                    for value in METRICS_ALLOWED_IPS.split(",") if value.strip()]
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# Size in bytes of the token digests stored and indexed in the tokens table
+TOKEN_DIGEST_SIZE = 16
+
+def token_digest(token: str) -> bytes:
+    """Return the fixed-size digest a token is stored and looked up by"""
+    return hashlib.blake2b(token.encode(), digest_size=TOKEN_DIGEST_SIZE).digest()
+
 # Token creation functions
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create a new access token"""
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire, "type": "access"})
+    to_encode.update({"exp": expire, "type": "access", "jti": secrets.token_hex(16)})
     
     try:
         encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
@@ -41,7 +55,7 @@ def create_refresh_token(data: Dict[str, Any], expires_delta: Optional[timedelta
     """Create a new refresh token"""
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "type": "refresh", "jti": secrets.token_hex(16)})
     
     try:
         encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
@@ -82,12 +96,12 @@ def verify_token(token: str, token_type: str) -> Dict[str, Any]:
 
 # Get current user from token
 async def get_current_user(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     token: str = Depends(oauth2_scheme)
 ):
-    """Get the current user from the access token"""
+    """Get the current user from the access token (token checks are cached on repeat requests)"""
     from ..models.user import User
-    from ..models.token import Token as TokenModel
+    from ..db.queries import TOKEN_IS_REVOKED
     
     # Verify the token
     payload = verify_token(token, "access")
@@ -101,24 +115,51 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Check if token is in database and not revoked
-    db_token = db.query(TokenModel).filter(
-        TokenModel.access_token == token,
-        TokenModel.is_revoked == False
-    ).first()
-    
-    if not db_token:
-        logger.warning(f"Token not found in database or revoked: {token[:10]}...")
+    # Revocations pushed from other workers are checked first
+    access_token_hash = token_digest(token)
+    if revocation_registry.is_revoked(access_token_hash):
+        logger.warning(f"Token revoked (broadcast): {token[:10]}...")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token revoked or invalid",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Get the user
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    # Serve repeat requests for the same token from the cache
+    cached = token_cache.get(access_token_hash)
+    if cached is not None:
+        if cached.is_revoked:
+            logger.warning(f"Token revoked (cached): {token[:10]}...")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token revoked or invalid",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+    else:
+        if revocation_registry.ready:
+            # The in-memory revoked set is authoritative while the listener is synced
+            is_revoked = False
+        else:
+            # Check if token is in database and not revoked
+            result = await execute_read(db, TOKEN_IS_REVOKED, {"access_token_hash": access_token_hash})
+            is_revoked = result.scalar_one_or_none()
+        
+        if is_revoked is None or is_revoked:
+            logger.warning(f"Token not found in database or revoked: {token[:10]}...")
+            # Revocation is final, so remember it until the token expires
+            token_cache.set(access_token_hash, int(user_id), True, payload["exp"])
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token revoked or invalid",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        
+        token_cache.set(access_token_hash, int(user_id), False, payload["exp"])
+    
+    # Always load the user, so a demoted or deactivated user loses access at once
+    db_user = await db.get(User, int(user_id))
     
-    if not user:
+    if not db_user:
         logger.warning(f"User not found: {user_id}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -126,6 +167,8 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    user = UserSchema.from_orm(db_user)
+    
     if not user.is_active:
         logger.warning(f"Inactive user: {user_id}")
         raise HTTPException(
@@ -147,19 +190,28 @@ async def get_admin_user(current_user = Depends(get_current_user)):
         )
     return current_user
 
+# Metrics scrapers
+def require_metrics_access(request: Request):
+    """Allow only the configured scraper addresses (METRICS_ALLOWED_IPS)"""
+    client_ip = request.client.host if request.client else None
+    try:
+        address = ipaddress.ip_address(client_ip)
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+    except (TypeError, ValueError):
+        address = None
+
+    if address is None or not any(address in network for network in METRICS_NETWORKS):
+        logger.warning(f"Metrics request from disallowed address {client_ip}")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+
 # Content sanitization
-def sanitize_html(content: str) -> str:
+def sanitize_html(content: str, policy: str = "default") -> str:
     """Sanitize HTML content to prevent XSS attacks"""
-    return bleach.clean(
-        content,
-        tags=['p', 'b', 'i', 'u', 'em', 'strong', 'a', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 
-              'ul', 'ol', 'li', 'br', 'hr', 'pre', 'code', 'blockquote', 'img'],
-        attributes={
-            'a': ['href', 'title', 'target'],
-            'img': ['src', 'alt', 'title', 'width', 'height'],
-        },
-        strip=True
-    )
+    return html_sanitizer.clean(content, policy)
 
 # Generate secure random string
 def generate_secure_random_string(length: int = 32) -> str:
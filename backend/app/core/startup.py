@@ -0,0 +1,103 @@
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from loguru import logger
+from sqlalchemy import text
+from ..db.queries import TOKEN_IS_REVOKED
+from ..db.session import AsyncSessionLocal, async_engine
+from ..models.user import User
+from .hashing import hashing_pool
+from .security import TOKEN_DIGEST_SIZE, create_access_token, verify_token
+
+# Startup settings
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "true").lower() in ("1", "true", "yes")
+WARMUP = os.getenv("WARMUP", "false").lower() in ("1", "true", "yes")
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", 0))  # 0: the pool size
+
+# Migrations live next to the app package
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCHEMA = "app_schema"
+
+def get_head_revision() -> Optional[str]:
+    """Latest migration revision shipped with the code"""
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    return ScriptDirectory.from_config(config).get_current_head()
+
+def _current_revision(connection) -> Optional[str]:
+    context = MigrationContext.configure(connection, opts={"version_table_schema": SCHEMA})
+    return context.get_current_revision()
+
+async def check_schema() -> bool:
+    """
+    Check that the database has been migrated to the latest revision.
+
+    The app no longer creates tables itself; `alembic upgrade head` does, as a
+    deploy step. A missing or outdated schema is logged rather than fatal so the
+    process still starts and reports itself unready.
+    """
+    try:
+        head = get_head_revision()
+        async with async_engine.connect() as conn:
+            current = await conn.run_sync(_current_revision)
+    except Exception as e:
+        logger.error(f"Schema check failed: {e}")
+        return False
+
+    if current != head:
+        logger.error(f"Database schema is at revision {current}, expected {head}; run `alembic upgrade head`")
+        return False
+
+    logger.info(f"Database schema is at revision {current}")
+    return True
+
+async def _open_connections(count: int) -> None:
+    # Hold every connection at once so the pool really opens `count` of them
+    connections = await asyncio.gather(*(async_engine.connect().start() for _ in range(count)))
+    try:
+        for conn in connections:
+            await conn.execute(text("SELECT 1"))
+    finally:
+        for conn in connections:
+            await conn.close()
+
+async def _prime_queries() -> None:
+    # Compile the token validation queries once so SQLAlchemy's statement cache is warm
+    async with AsyncSessionLocal() as db:
+        await db.execute(TOKEN_IS_REVOKED, {"access_token_hash": bytes(TOKEN_DIGEST_SIZE)})
+        await db.get(User, 0)
+
+async def _jwt_round_trip() -> None:
+    verify_token(create_access_token({"sub": "0"}), "access")
+
+async def warm_up() -> Dict[str, float]:
+    """
+    Pay the cold-path costs before serving: open pool connections, compile the
+    token validation queries, sign and verify one JWT and run one Argon2 hash
+    (which also starts the hashing pool's threads).
+
+    Returns the seconds each step took. Failures are logged and skipped.
+    """
+    timings: Dict[str, float] = {}
+    pool_size = getattr(async_engine.pool, "size", lambda: 1)()
+    steps = {
+        "db_connections": lambda: _open_connections(WARMUP_CONNECTIONS or pool_size),
+        "queries": _prime_queries,
+        "jwt": _jwt_round_trip,
+        "argon2": lambda: hashing_pool.hash("warm-up password"),
+    }
+    for name, step in steps.items():
+        start_time = time.perf_counter()
+        try:
+            await step()
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e}")
+            continue
+        timings[name] = round(time.perf_counter() - start_time, 4)
+
+    logger.info(f"Warm-up finished: {timings}")
+    return timings
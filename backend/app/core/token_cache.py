@@ -0,0 +1,126 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Set
+from loguru import logger
+from .metrics import metrics_registry
+
+# Token cache settings
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))  # max cached access tokens per process
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", 60))  # seconds an entry may be served without the DB
+
+class CachedToken(NamedTuple):
+    expires_at: float
+    user_id: int
+    is_revoked: bool
+
+class TokenCache:
+    """
+    In-process LRU + TTL cache of validated access tokens.
+
+    Maps an access token digest to its user id and revoked flag so get_current_user
+    can skip the token query on repeat requests. The user itself is not cached:
+    it is loaded on every request, so role and is_active changes apply at once.
+    Entries expire after `ttl` seconds and never outlive the token's own `exp`.
+    Revocations made through Token.revoke_all_user_tokens or token refresh
+    invalidate entries explicitly; the cache is per process.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, ttl: float = TOKEN_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Any, CachedToken]" = OrderedDict()
+        self._user_tokens: Dict[int, Set[Any]] = {}
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        logger.info(f"Token cache initialized with max_size={max_size}, ttl={ttl}s")
+
+    def get(self, key: Any) -> Optional[CachedToken]:
+        """Return the cached entry for a token, or None on a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.expires_at <= time.time():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set(self, key: Any, user_id: int, is_revoked: bool, token_exp: float) -> None:
+        """Cache a validated token until the TTL or the token's exp, whichever comes first"""
+        if self.max_size <= 0:
+            return
+
+        expires_at = min(time.time() + self.ttl, token_exp)
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = CachedToken(expires_at, user_id, is_revoked)
+        self._user_tokens.setdefault(user_id, set()).add(key)
+
+        # Evict least recently used entries
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate_token(self, key: Any) -> None:
+        """Drop a single token"""
+        if key in self._entries:
+            self._remove(key)
+            self.invalidations += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached token of a user"""
+        for key in list(self._user_tokens.get(user_id, ())):
+            self._remove(key)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._user_tokens.clear()
+
+    def _remove(self, key: Any) -> None:
+        entry = self._entries.pop(key)
+        keys = self._user_tokens.get(entry.user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_tokens[entry.user_id]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+# Create a global token cache instance
+token_cache = TokenCache()
+
+# Expose the cache counters so the saving shows up in production metrics
+metrics_registry.collector(
+    "token_cache_hits_total", "Access token checks answered from the token cache", "counter",
+    lambda: [("token_cache_hits_total", {}, token_cache.hits)])
+metrics_registry.collector(
+    "token_cache_misses_total", "Access token checks that went to the database", "counter",
+    lambda: [("token_cache_misses_total", {}, token_cache.misses)])
+metrics_registry.collector(
+    "token_cache_entries", "Access tokens currently cached", "gauge",
+    lambda: [("token_cache_entries", {}, len(token_cache._entries))])
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from loguru import logger
+from sqlalchemy import delete, select
+from ..db.session import AsyncSessionLocal
+from ..models.token import Token as TokenModel
+from .metrics import metrics_registry
+
+# Token reaper settings
+TOKEN_REAPER = os.getenv("TOKEN_REAPER", "true").lower() in ("1", "true", "yes")
+TOKEN_REAPER_INTERVAL = float(os.getenv("TOKEN_REAPER_INTERVAL", 300))  # seconds between runs
+TOKEN_REAPER_BATCH_SIZE = int(os.getenv("TOKEN_REAPER_BATCH_SIZE", 1000))  # rows deleted per transaction
+TOKEN_REAPER_BATCH_DELAY = float(os.getenv("TOKEN_REAPER_BATCH_DELAY", 0.1))  # seconds between batches
+TOKEN_REAPER_MAX_BATCHES = int(os.getenv("TOKEN_REAPER_MAX_BATCHES", 100))  # per run; the rest waits for the next one
+TOKEN_REAPER_RETENTION = float(os.getenv("TOKEN_REAPER_RETENTION", 0))  # seconds expired rows are kept
+
+# Reaper metrics
+reaper_deleted = metrics_registry.counter(
+    "token_reaper_deleted_total", "Expired token rows deleted").labels()
+reaper_runs = metrics_registry.counter(
+    "token_reaper_runs_total", "Reaper runs by outcome", ("outcome",))
+reaper_run_duration = metrics_registry.histogram(
+    "token_reaper_run_duration_seconds", "Time taken by one reaper run",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 120)).labels()
+reaper_last_success = metrics_registry.gauge(
+    "token_reaper_last_success_timestamp_seconds", "Unix time the reaper last finished a run").labels()
+
+class TokenReaper:
+    """
+    Deletes token rows whose refresh token has expired.
+
+    Such rows can no longer authenticate anything: the access token expires
+    before the refresh token, and JWT validation rejects both on their own.
+    Rows go in batches of `batch_size`, each in its own short transaction and
+    ordered by expiry so it walks the expiry index, with a pause between
+    batches. Rows another transaction holds are skipped (SKIP LOCKED), so
+    several workers can run the reaper at once without blocking each other
+    or the request handlers.
+    """
+
+    def __init__(self, enabled: bool = TOKEN_REAPER, interval: float = TOKEN_REAPER_INTERVAL,
+                 batch_size: int = TOKEN_REAPER_BATCH_SIZE, batch_delay: float = TOKEN_REAPER_BATCH_DELAY,
+                 max_batches: int = TOKEN_REAPER_MAX_BATCHES, retention: float = TOKEN_REAPER_RETENTION):
+        self.enabled = enabled
+        self.interval = interval
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_batches = max_batches
+        self.retention = retention
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.runs = 0
+        self.deleted = 0
+        self.errors = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    async def _delete_batch(self, cutoff: datetime) -> int:
+        batch = (
+            select(TokenModel.id)
+            .where(TokenModel.refresh_token_expires_at < cutoff)
+            .order_by(TokenModel.refresh_token_expires_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(TokenModel).where(TokenModel.id.in_(batch.scalar_subquery())),
+                execution_options={"synchronize_session": False},
+            )
+            await db.commit()
+        return result.rowcount
+
+    async def run_once(self) -> int:
+        """Delete expired rows, up to max_batches batches; return the number deleted"""
+        start_time = time.perf_counter()
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.retention)
+        deleted = 0
+        batches = 0
+        try:
+            while batches < self.max_batches:
+                count = await self._delete_batch(cutoff)
+                batches += 1
+                deleted += count
+                reaper_deleted.inc(count)
+                if count < self.batch_size:
+                    break
+                await asyncio.sleep(self.batch_delay)
+        except Exception as e:
+            self.errors += 1
+            reaper_runs.labels("error").inc()
+            logger.error(f"Token reaper failed after deleting {deleted} rows: {e}")
+            return deleted
+        finally:
+            self.deleted += deleted
+            duration = time.perf_counter() - start_time
+            reaper_run_duration.observe(duration)
+
+        self.runs += 1
+        reaper_runs.labels("complete" if batches < self.max_batches else "partial").inc()
+        reaper_last_success.set(time.time())
+        self.last_run = {"deleted": deleted, "batches": batches, "seconds": round(duration, 4)}
+        if deleted:
+            logger.info(f"Token reaper deleted {deleted} expired tokens in {batches} batches ({duration:.2f}s)")
+        return deleted
+
+    async def _loop(self) -> None:
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        """Start the reaper task"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            logger.info(f"Token reaper started (every {self.interval}s, batches of {self.batch_size})")
+
+    async def stop(self) -> None:
+        """Stop the reaper task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return reaper state and counters"""
+        return {
+            "enabled": self.enabled,
+            "runs": self.runs,
+            "deleted": self.deleted,
+            "errors": self.errors,
+            "last_run": self.last_run,
+        }
+
+# Create a global token reaper instance
+token_reaper = TokenReaper()
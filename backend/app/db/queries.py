@@ -0,0 +1,87 @@
+"""
+Fixed lookup statements, built once at import.
+
+SQLAlchemy memoizes a statement object's cache key, so executing the same
+object with different bound parameters skips rebuilding the query and
+recomputing its key, and always hits the engine's compiled SQL cache. With the
+direct pool profile asyncpg also reuses the server-side prepared statement.
+Pass the parameters by name, e.g. `db.execute(USER_BY_USERNAME, {"username": name})`.
+"""
+from sqlalchemy import Integer, bindparam, case, func, select, update
+from ..models.token import Token as TokenModel
+from ..models.user import MAX_FAILED_LOGIN_ATTEMPTS, User
+
+# Token validation on every authenticated request without a cached token
+TOKEN_IS_REVOKED = (
+    select(TokenModel.is_revoked)
+    .where(TokenModel.access_token_hash == bindparam("access_token_hash"))
+    .limit(1)
+)
+
+# Refresh token rotation: revoke the presented token if it is still active and
+# return what the handler needs, in one statement. Concurrent refreshes with the
+# same token queue on the row lock and re-check is_revoked, so only one gets a row.
+# A Core UPDATE: the ORM's RETURNING doesn't take the user subquery.
+_tokens = TokenModel.__table__
+REVOKE_REFRESH_TOKEN = (
+    update(_tokens)
+    .where(_tokens.c.refresh_token_hash == bindparam("presented_hash"), _tokens.c.is_revoked == False)
+    .values(is_revoked=True)
+    .returning(
+        _tokens.c.user_id,
+        _tokens.c.access_token_hash,
+        _tokens.c.access_token_expires_at,
+        (_tokens.c.refresh_token_expires_at <= func.now()).label("refresh_token_expired"),
+        select(User.is_active).where(User.id == _tokens.c.user_id).scalar_subquery().label("user_is_active"),
+    )
+)
+
+# A user's active sessions, newest first (ix_app_schema_tokens_user_id_active)
+ACTIVE_SESSIONS = (
+    select(
+        _tokens.c.id,
+        _tokens.c.user_agent,
+        _tokens.c.ip_address,
+        _tokens.c.created_at,
+        _tokens.c.refresh_token_expires_at,
+        _tokens.c.access_token_hash,
+    )
+    .where(
+        _tokens.c.user_id == bindparam("user_id"),
+        _tokens.c.is_revoked == False,
+        _tokens.c.refresh_token_expires_at > func.now(),
+    )
+    .order_by(_tokens.c.created_at.desc())
+    .limit(bindparam("limit", type_=Integer))
+)
+
+# Revoke one of a user's sessions (a bind named user_id would clash with the column in an UPDATE)
+REVOKE_SESSION = (
+    update(_tokens)
+    .where(
+        _tokens.c.id == bindparam("session_id"),
+        _tokens.c.user_id == bindparam("owner_id"),
+        _tokens.c.is_revoked == False,
+    )
+    .values(is_revoked=True)
+    .returning(_tokens.c.access_token_hash, _tokens.c.access_token_expires_at)
+)
+
+# Login
+USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+
+# Failed login: count the attempt and lock the account at the threshold in one
+# atomic statement, so concurrent failures can't overwrite each other's increments
+_users = User.__table__
+RECORD_FAILED_LOGIN = (
+    update(_users)
+    .where(_users.c.id == bindparam("user_id"))
+    .values(
+        failed_login_attempts=_users.c.failed_login_attempts + 1,
+        locked_until=case(
+            (_users.c.failed_login_attempts + 1 >= MAX_FAILED_LOGIN_ATTEMPTS, bindparam("lock_until")),
+            else_=_users.c.locked_until,
+        ),
+    )
+    .returning(_users.c.failed_login_attempts)
+)
@@ -1,28 +1,193 @@
-from sqlalchemy import create_engine
+from typing import Any, Dict, Optional, Sequence
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 import os
 from loguru import logger
 from tenacity import retry, stop_after_attempt, wait_fixed
+from ..core.metrics import metrics_registry
 
 # Get database URL from environment variable
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://app_user:secure_password@db:5432/portfolio")
 
+# Async drivers for the sync database URL schemes we support
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def get_async_database_url(url: str) -> str:
+    """Derive the async driver URL from a sync database URL"""
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", get_async_database_url(DATABASE_URL))
+
+# Connection pool settings
+DB_POOL_PROFILE = os.getenv("DB_POOL_PROFILE", "direct")  # "direct" to Postgres, or "pgbouncer" in transaction mode
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))  # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 300))  # seconds before a connection is replaced
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", 10))
+
+POOL_PROFILES = ("direct", "pgbouncer")
+if DB_POOL_PROFILE not in POOL_PROFILES:
+    raise ValueError(f"DB_POOL_PROFILE must be one of {', '.join(POOL_PROFILES)}, not {DB_POOL_PROFILE!r}")
+
+def _pgbouncer_connection_class():
+    import asyncpg
+    from uuid import uuid4
+
+    class PgBouncerConnection(asyncpg.Connection):
+        # Statement names unique across clients: PgBouncer may hand another
+        # client's server connection to us between transactions
+        def _get_unique_id(self, prefix: str) -> str:
+            return f"__asyncpg_{prefix}_{uuid4()}__"
+
+    return PgBouncerConnection
+
+def engine_options(url: str, profile: str = DB_POOL_PROFILE, pre_ping: bool = DB_POOL_PRE_PING) -> Dict[str, Any]:
+    """
+    create_engine() arguments for the configured pool profile.
+
+    "direct" keeps a sized pool of connections to Postgres. "pgbouncer" leaves
+    pooling to PgBouncer: no pool in the app (NullPool) and no server-side
+    prepared statement caches, which don't survive transaction pooling.
+    Databases other than Postgres (SQLite in the benchmarks) use SQLAlchemy's defaults.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return {}
+
+    is_asyncpg = parsed.get_driver_name() == "asyncpg"
+    options: Dict[str, Any] = {
+        "connect_args": {"timeout": DB_CONNECT_TIMEOUT} if is_asyncpg else {"connect_timeout": DB_CONNECT_TIMEOUT},
+    }
+    if profile == "pgbouncer":
+        options["poolclass"] = NullPool
+        if is_asyncpg:
+            options["connect_args"].update({
+                "statement_cache_size": 0,           # asyncpg's own cache
+                "prepared_statement_cache_size": 0,  # SQLAlchemy's asyncpg adapter cache
+                "connection_class": _pgbouncer_connection_class(),
+            })
+    else:
+        options.update({
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            # Off by default: a dead connection is detected by the error it raises instead
+            "pool_pre_ping": pre_ping,
+        })
+    return options
+
 # Create engine with connection pooling and timeout settings
 try:
-    engine = create_engine(
-        DATABASE_URL,
-        pool_pre_ping=True,  # Check connection before using it
-        pool_recycle=300,    # Recycle connections after 5 minutes
-        connect_args={"connect_timeout": 10}  # Connection timeout
-    )
+    engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
     logger.info("Database engine created successfully")
 except Exception as e:
     logger.error(f"Failed to create database engine: {e}")
     raise
 
-# Create session factory
+# Create async engine used by the request handlers so queries don't block the event loop
+try:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+    logger.info(f"Async database engine created successfully ({DB_POOL_PROFILE} pool profile)")
+except Exception as e:
+    logger.error(f"Failed to create async database engine: {e}")
+    raise
+
+db_disconnects = metrics_registry.counter(
+    "db_disconnects_total", "Statements that failed because the database connection was lost", ("pool",))
+
+def _on_disconnect(label: str):
+    disconnects = db_disconnects.labels(label)
+
+    def handle_error(context):
+        # SQLAlchemy invalidates the connection and every pooled connection
+        # opened before it, so the next checkouts reconnect
+        if context.is_disconnect:
+            disconnects.inc()
+            logger.warning(f"Database connection lost ({label} pool): {context.original_exception!r}")
+    return handle_error
+
+event.listen(engine, "handle_error", _on_disconnect("sync"))
+event.listen(async_engine.sync_engine, "handle_error", _on_disconnect("async"))
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False keeps loaded attributes usable after commit without a lazy reload,
+# which an AsyncSession can't do implicitly
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+def _pool_samples(name: str, read):
+    """Yield a sample per engine pool for pool implementations that track it"""
+    for label, pool in (("sync", engine.pool), ("async", async_engine.pool)):
+        if hasattr(pool, "checkedout"):
+            yield name, {"pool": label}, read(pool)
+
+# Connection pool gauges, read at scrape time
+metrics_registry.collector(
+    "db_pool_checked_out", "Connections checked out of the pool", "gauge",
+    lambda: _pool_samples("db_pool_checked_out", lambda pool: pool.checkedout()))
+metrics_registry.collector(
+    "db_pool_overflow", "Connections open beyond the pool size (negative while below it)", "gauge",
+    lambda: _pool_samples("db_pool_overflow", lambda pool: pool.overflow()))
+metrics_registry.collector(
+    "db_pool_size", "Configured pool size", "gauge",
+    lambda: _pool_samples("db_pool_size", lambda pool: pool.size()))
+
+async def use_autocommit(db: AsyncSession) -> None:
+    """
+    Run the session's next statements outside a transaction, saving the BEGIN and
+    COMMIT round trips. Only for a single read or a single atomic write; it must be
+    called while the session holds no connection (before its first statement or
+    after a commit). The connection's isolation level is reset when it is released.
+    """
+    await db.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+
+async def execute_read(db: AsyncSession, statement, params=None):
+    """
+    Execute a read that starts the session's transaction, retrying once on a
+    new connection if the pooled one turned out to be dead. This replaces a
+    pre-ping on every checkout. Don't use it after the session has written:
+    the retry rolls the session back.
+    """
+    try:
+        return await db.execute(statement, params)
+    except DBAPIError as e:
+        if not e.connection_invalidated:
+            raise
+        logger.warning("Retrying read on a new database connection")
+        await db.rollback()
+        return await db.execute(statement, params)
+
+def unique_violation(error: IntegrityError, columns: Sequence[str]) -> Optional[str]:
+    """
+    Return which of `columns` a unique constraint violation is on, or None for
+    any other integrity error. Uses the driver's constraint name where it has
+    one (asyncpg, psycopg2) and falls back to the message (SQLite).
+    """
+    orig = error.orig
+    # asyncpg's error is chained under SQLAlchemy's adapter exception
+    constraint = getattr(orig.__cause__, "constraint_name", None) or \
+        getattr(getattr(orig, "diag", None), "constraint_name", None)
+    for column in columns:
+        if constraint:
+            if constraint.endswith(f"_{column}") or constraint.endswith(f"_{column}_key"):
+                return column
+        elif f".{column}" in str(orig):
+            return column
+    return None
 
 # Create base class for models
 Base = declarative_base()
@@ -38,4 +203,19 @@ def get_db():
         logger.error(f"Database session error: {e}")
         raise
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            logger.debug("Async database session closed successfully")
+        except SQLAlchemyError as e:
+            logger.error(f"Async database session error: {e}")
+            await db.rollback()
+            raise
+        except Exception:
+            # Expected errors such as a 401 on a failed login or an invalid request body
+            await db.rollback()
+            raise
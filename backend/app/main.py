@@ -1,43 +1,73 @@
-from fastapi import FastAPI, Request, Depends
+import time
+
+# Measured from the first line of the app so the ready log covers import time
+IMPORT_STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import os
-import sys
 from loguru import logger
-import time
 from datetime import datetime
 
-from .db.session import engine, Base
-from .api import auth
-from .middleware.rate_limiter import rate_limit_middleware
-from .middleware.csrf import csrf_protect_middleware
-from .core.security import get_current_user, sanitize_html
+from .api import admin, auth, sessions
+from .middleware.rate_limiter import RateLimitMiddleware, rate_limiter
+from .middleware.csrf import CSRFMiddleware
+from .middleware.request_logging import RequestLoggingMiddleware
+from .middleware.security_headers import SecurityHeadersMiddleware
+from .middleware.metrics import MetricsMiddleware
+from .core.security import get_current_user, get_admin_user, require_metrics_access
+from .core.hashing import hashing_pool
+from .core.logging import access_log_writer, setup_logging
+from .core.metrics import CONTENT_TYPE_LATEST, metrics_registry
+from .core.token_cache import token_cache
+from .core.revocation import revocation_registry
+from .core.readiness import readiness_probe
+from .core.responses import DefaultResponse, json_response
+from .core.sanitizer import html_sanitizer, sanitize_pool
+from .core.token_reaper import token_reaper
+from .core.startup import SCHEMA_CHECK, WARMUP, check_schema, warm_up
+from .schemas.sanitize import SanitizeBatch, SanitizeBatchResult
 
 # Configure logging
-logger.remove()
-logger.add(
-    sys.stdout,
-    colorize=True,
-    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-    level=os.getenv("LOG_LEVEL", "INFO")
-)
-logger.add(
-    "logs/app.log",
-    rotation="10 MB",
-    retention="30 days",
-    compression="zip",
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
-    level=os.getenv("LOG_LEVEL", "INFO")
-)
-
-# Create tables only if they don't exist
-from sqlalchemy import inspect
-inspector = inspect(engine)
-if not inspector.has_table("users", schema="app_schema"):
-    logger.info("Creating database tables")
-    Base.metadata.create_all(bind=engine)
-else:
-    logger.info("Database tables already exist")
+setup_logging()
+
+# Time taken to import the app, before any startup work
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+
+# Startup and shutdown; nothing touches the database at import time
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup_started = time.perf_counter()
+    app.state.startup = {"import_seconds": round(IMPORT_SECONDS, 4)}
+
+    # Tables are created by `alembic upgrade head`, not by the app
+    if SCHEMA_CHECK:
+        app.state.startup["schema_ok"] = await check_schema()
+    if WARMUP:
+        app.state.startup["warmup"] = await warm_up()
+
+    # Start background listeners and maintenance
+    await revocation_registry.start()
+    await token_reaper.start()
+
+    app.state.startup["startup_seconds"] = round(time.perf_counter() - startup_started, 4)
+    app.state.startup["import_to_ready_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 4)
+    logger.info(f"Application ready in {app.state.startup['import_to_ready_seconds']}s "
+                f"(import {app.state.startup['import_seconds']}s, startup {app.state.startup['startup_seconds']}s)")
+
+    yield
+
+    # Release background workers on shutdown
+    await token_reaper.stop()
+    await revocation_registry.stop()
+    await rate_limiter.close()
+    hashing_pool.shutdown()
+    sanitize_pool.shutdown()
+    # Flush the access log and the enqueued log sinks
+    access_log_writer.stop()
+    await logger.complete()
 
 # Create FastAPI app
 app = FastAPI(
@@ -46,6 +76,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=DefaultResponse,
 )
 
 # CORS configuration
@@ -59,58 +91,13 @@ app.add_middleware(
     expose_headers=["X-CSRF-Token"],
 )
 
-# Add rate limiting middleware
-@app.middleware("http")
-async def rate_limiting(request: Request, call_next):
-    return await rate_limit_middleware(request, call_next)
-
-# Add CSRF protection middleware
-@app.middleware("http")
-async def csrf_protection(request: Request, call_next):
-    return await csrf_protect_middleware(request, call_next)
-
-# Add request logging middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-
-    # Get client info
-    client_ip = request.client.host if request.client else "unknown"
-    user_agent = request.headers.get("User-Agent", "unknown")
-
-    # Log request
-    logger.info(f"Request: {request.method} {request.url.path} from {client_ip} ({user_agent})")
-
-    # Process request
-    response = await call_next(request)
-
-    # Calculate processing time
-    process_time = time.time() - start_time
-
-    # Log response
-    logger.info(f"Response: {request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.4f}s")
-
-    # Add processing time header
-    response.headers["X-Process-Time"] = str(process_time)
-
-    return response
-
-# Add security headers middleware
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    response = await call_next(request)
-
-    # Add security headers
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    response.headers["Permissions-Policy"] = "camera=(), microphone=(), geolocation=()"
-
-    # Add Content-Security-Policy header
-    response.headers["Content-Security-Policy"] = "default-src 'self'; script-src 'self' 'unsafe-inline'; style-src 'self' 'unsafe-inline'; img-src 'self' data:; font-src 'self'; connect-src 'self'; frame-ancestors 'none'; form-action 'self';"
-
-    return response
+# Pure ASGI middlewares, added innermost first: each request passes through
+# metrics, security headers, logging, CSRF and rate limiting before CORS and the routes
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(CSRFMiddleware)
+app.add_middleware(RequestLoggingMiddleware)
+app.add_middleware(SecurityHeadersMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Exception handler
 @app.exception_handler(Exception)
@@ -123,33 +110,46 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 # Include routers
 app.include_router(auth.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
+app.include_router(sessions.router, prefix="/api")
 
 # Root endpoint
 @app.get("/")
 async def root():
-    return {
+    return json_response({
         "message": "Portfolio API",
         "docs": "/docs",
         "redoc": "/redoc",
         "timestamp": datetime.utcnow().isoformat()
-    }
+    })
 
 # Health check endpoint
 @app.get("/health")
 async def health():
-    return {
+    return json_response({
         "status": "ok",
         "timestamp": datetime.utcnow().isoformat()
-    }
+    })
+
+# Readiness check: database reachability and pool usage, for the orchestrator
+@app.get("/ready")
+async def ready():
+    readiness = await readiness_probe.check()
+    # A database that isn't migrated can't serve requests either
+    if getattr(app.state, "startup", {}).get("schema_ok") is False:
+        readiness["status"] = "unavailable"
+        readiness["schema_ok"] = False
+    readiness["timestamp"] = datetime.utcnow().isoformat()
+    return DefaultResponse(status_code=200 if readiness["status"] == "ok" else 503, content=readiness)
 
 # Protected endpoint example
 @app.get("/api/protected")
 async def protected_route(current_user = Depends(get_current_user)):
-    return {
+    return json_response({
         "message": "This is a protected endpoint",
         "user": current_user.username,
         "timestamp": datetime.utcnow().isoformat()
-    }
+    })
 
 # Content sanitization example
 @app.post("/api/sanitize")
@@ -157,9 +157,46 @@ async def sanitize_content(content: dict, current_user = Depends(get_current_use
     if "html" not in content:
         return {"error": "No HTML content provided"}
 
-    sanitized = sanitize_html(content["html"])
+    # Sanitized off the event loop; a large document would otherwise stall every request
+    sanitized = await sanitize_pool.clean(content["html"])
     return {"sanitized": sanitized}
 
+# Batch sanitization for editor saves; results are in input order
+@app.post("/api/sanitize/batch", response_model=SanitizeBatchResult)
+async def sanitize_batch(batch: SanitizeBatch, current_user = Depends(get_current_user)):
+    if batch.policy not in html_sanitizer.policies:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown sanitizer policy: {batch.policy}"
+        )
+
+    sanitized = await sanitize_pool.clean_many(batch.fragments, batch.policy)
+    return {"sanitized": sanitized}
+
+# Internal counters for admins
+@app.get("/api/stats")
+async def stats(current_user = Depends(get_admin_user)):
+    return {
+        "token_cache": token_cache.stats(),
+        "hashing_pool": hashing_pool.stats(),
+        "revocation": revocation_registry.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "access_log": access_log_writer.stats(),
+        "readiness": readiness_probe.stats(),
+        "token_reaper": token_reaper.stats(),
+        "sanitizer": html_sanitizer.stats(),
+        "sanitize_pool": sanitize_pool.stats(),
+        "startup": getattr(app.state, "startup", {}),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# Prometheus scrape endpoint, for the addresses in METRICS_ALLOWED_IPS
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+async def metrics():
+    return Response(content=metrics_registry.render(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    # Development server; production runs gunicorn with gunicorn_conf.py
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000,
+                reload=os.getenv("RELOAD", "false").lower() in ("1", "true", "yes"))
@@ -1,11 +1,15 @@
-from fastapi import Request, HTTPException, status, Depends
+import secrets
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
 from fastapi.security import APIKeyCookie
+from starlette.requests import HTTPConnection
 from fastapi_csrf_protect import CsrfProtect
 from fastapi_csrf_protect.exceptions import CsrfProtectError
 from pydantic import BaseModel
 import os
 from loguru import logger
 from ..core.security import generate_secure_random_string
+from .paths import get_path_info
 
 # CSRF settings
 CSRF_SECRET = os.getenv("CSRF_SECRET", generate_secure_random_string(32))
@@ -32,51 +36,56 @@ def get_csrf_config():
 # CSRF cookie dependency
 csrf_cookie = APIKeyCookie(name=CSRF_COOKIE_NAME, auto_error=False)
 
-# CSRF protection middleware for non-GET requests
-async def csrf_protect_middleware(request: Request, call_next):
-    """CSRF protection middleware for non-GET, non-HEAD, non-OPTIONS requests"""
-    # Skip CSRF check for GET, HEAD, OPTIONS requests
-    if request.method in ["GET", "HEAD", "OPTIONS"]:
-        response = await call_next(request)
-        return response
-    
-    # Skip CSRF check for API endpoints that use JWT authentication
-    if request.url.path.startswith("/api/") and not request.url.path.startswith("/api/auth/"):
-        response = await call_next(request)
-        return response
-    
-    # Check CSRF token
-    csrf_protect = CsrfProtect()
-    try:
-        # Get CSRF token from cookie and header
-        csrf_cookie_token = request.cookies.get(CSRF_COOKIE_NAME)
-        csrf_header_token = request.headers.get(CSRF_HEADER_NAME)
-        
-        # Validate CSRF token
-        if not csrf_cookie_token or not csrf_header_token:
-            logger.warning(f"Missing CSRF token for {request.url.path}")
-            raise CsrfProtectError("Missing CSRF token")
-        
-        await csrf_protect.validate_csrf(csrf_header_token, csrf_cookie_token)
-        
+# Methods that don't change state and skip the CSRF check
+CSRF_SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+class CSRFMiddleware:
+    """ASGI CSRF protection middleware for non-GET, non-HEAD, non-OPTIONS requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # Skip CSRF check for safe methods and for API endpoints that use JWT authentication
+        if scope["type"] != "http" or scope["method"] in CSRF_SAFE_METHODS or get_path_info(scope).csrf_exempt:
+            return await self.app(scope, receive, send)
+
+        # Check CSRF token
+        connection = HTTPConnection(scope)
+        path = scope["path"]
+        csrf_protect = CsrfProtect()
+        try:
+            # Get CSRF token from cookie and header
+            csrf_cookie_token = connection.cookies.get(CSRF_COOKIE_NAME)
+            csrf_header_token = connection.headers.get(CSRF_HEADER_NAME)
+
+            # Validate CSRF token: signed by us and matching the cookie (double submit)
+            if not csrf_cookie_token or not csrf_header_token:
+                logger.warning(f"Missing CSRF token for {path}")
+                raise CsrfProtectError("Missing CSRF token")
+            if not secrets.compare_digest(csrf_cookie_token, csrf_header_token):
+                raise CsrfProtectError("CSRF token mismatch")
+
+            csrf_protect.validate_csrf(csrf_header_token)
+        except CsrfProtectError as e:
+            logger.warning(f"CSRF validation failed for {path}: {str(e)}")
+            response = JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"detail": "CSRF validation failed"}
+            )
+            return await response(scope, receive, send)
+
         # Continue with the request
-        response = await call_next(request)
-        return response
-    except CsrfProtectError as e:
-        logger.warning(f"CSRF validation failed for {request.url.path}: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="CSRF validation failed"
-        )
+        await self.app(scope, receive, send)
 
 # Generate new CSRF token
 async def generate_csrf_token(request: Request):
     """Generate a new CSRF token and set it in a cookie"""
     csrf_protect = CsrfProtect()
     response = {}
-    
-    # Generate new token
-    csrf_token = await csrf_protect.generate_csrf()
+
+    # Generate new token (signing is synchronous in fastapi-csrf-protect)
+    csrf_token = csrf_protect.generate_csrf()
     response["csrf_token"] = csrf_token
-    
-    return response
\ No newline at end of file
+
+    return response
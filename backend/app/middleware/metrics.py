@@ -0,0 +1,56 @@
+import time
+from typing import Dict
+from ..core.metrics import http_request_duration, http_requests, http_requests_in_flight
+
+# Route label for requests that matched no route (404s, or rejected before routing)
+UNMATCHED_ROUTE = "unmatched"
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request counts, latency and in-flight requests.
+
+    Requests are labelled with the template of the route that served them
+    (e.g. /api/users/{user_id}) so label cardinality stays bounded. The router
+    leaves the matched endpoint in the scope; templates are looked up from the
+    app's routes by endpoint.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._templates: Dict[object, str] = {}
+        self._route_count = -1
+        self._in_flight = http_requests_in_flight.labels()
+
+    def _route_template(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        routes = scope["app"].routes
+        if len(routes) != self._route_count:
+            # Routes changed (or first request): rebuild the endpoint -> template map
+            self._templates = {route.endpoint: route.path for route in routes if hasattr(route, "endpoint")}
+            self._route_count = len(routes)
+        return self._templates.get(endpoint, UNMATCHED_ROUTE)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self._in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self._in_flight.dec()
+            route = self._route_template(scope)
+            method = scope["method"]
+            http_requests.labels(route, method, str(status_code)).inc()
+            http_request_duration.labels(route, method).observe(time.perf_counter() - start_time)
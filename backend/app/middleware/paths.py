@@ -0,0 +1,26 @@
+from functools import lru_cache
+from typing import NamedTuple
+
+class PathInfo(NamedTuple):
+    rate_class: str      # rate limit policy: login, api or general
+    csrf_exempt: bool    # JWT-authenticated API paths don't use CSRF tokens
+
+@lru_cache(maxsize=4096)
+def classify_path(path: str) -> PathInfo:
+    """Classify a request path for the middleware stack"""
+    if path.startswith("/api/auth/login"):
+        rate_class = "login"
+    elif path.startswith("/api/"):
+        rate_class = "api"
+    else:
+        rate_class = "general"
+    csrf_exempt = path.startswith("/api/") and not path.startswith("/api/auth/")
+    return PathInfo(rate_class, csrf_exempt)
+
+def get_path_info(scope) -> PathInfo:
+    """Return the request's path classification, computed once per request and kept in its scope"""
+    state = scope.setdefault("state", {})
+    path_info = state.get("path_info")
+    if path_info is None:
+        path_info = state["path_info"] = classify_path(scope["path"])
+    return path_info
@@ -1,89 +1,264 @@
-from fastapi import Request, HTTPException, status
+from fastapi import HTTPException, Request, status
+from fastapi.responses import JSONResponse
 import time
-from typing import Dict, Tuple, Optional, Callable
+from collections import OrderedDict
+from typing import Dict, Hashable, List, NamedTuple, Optional, Sequence, Tuple
 import os
+from urllib.parse import parse_qs
 from loguru import logger
+from redis.exceptions import RedisError
+from ..core.metrics import metrics_registry
+from .paths import classify_path, get_path_info
+from .redis_rate_limit import RedisGCRAStore
 
-# Simple in-memory rate limiter
-class RateLimiter:
-    def __init__(self):
-        self.requests: Dict[str, Tuple[int, float]] = {}  # IP -> (count, start_time)
-        self.login_attempts: Dict[str, Tuple[int, float]] = {}  # username -> (count, start_time)
-        
-        # Rate limits from environment variables or defaults
-        self.general_rate_limit = int(os.getenv("GENERAL_RATE_LIMIT", "100"))  # requests per minute
-        self.login_rate_limit = int(os.getenv("LOGIN_RATE_LIMIT", "5"))  # login attempts per minute
-        self.api_rate_limit = int(os.getenv("API_RATE_LIMIT", "60"))  # API requests per minute
-        
-        # Window size in seconds
-        self.window_size = 60
-        
-        logger.info(f"Rate limiter initialized with limits: general={self.general_rate_limit}, login={self.login_rate_limit}, api={self.api_rate_limit}")
-
-    def _is_rate_limited(self, key: str, limit: int, storage: Dict[str, Tuple[int, float]]) -> bool:
-        """Check if a key is rate limited"""
-        current_time = time.time()
-        
-        if key in storage:
-            count, start_time = storage[key]
-            
-            # Reset if window has passed
-            if current_time - start_time > self.window_size:
-                storage[key] = (1, current_time)
-                return False
-            
-            # Increment count
-            storage[key] = (count + 1, start_time)
-            
-            # Check if limit exceeded
-            return count >= limit
-        else:
-            # First request
-            storage[key] = (1, current_time)
+# Login forms up to this size are read by the middleware to find the username
+LOGIN_FORM_MAX_BYTES = 4096
+
+class RateLimitPolicy(NamedTuple):
+    """Allow `limit` requests per `period` seconds, with up to `burst` back to back"""
+    name: str
+    limit: int
+    period: float = 60.0
+    burst: Optional[int] = None
+
+    @property
+    def emission_interval(self) -> float:
+        # Time one request "costs" at the sustained rate
+        return self.period / self.limit
+
+    @property
+    def burst_tolerance(self) -> float:
+        return self.emission_interval * (self.burst or self.limit)
+
+def _policy_from_env(name: str, default_limit: int) -> RateLimitPolicy:
+    prefix = name.upper()
+    burst = os.getenv(f"{prefix}_RATE_BURST")
+    return RateLimitPolicy(
+        name=name,
+        limit=int(os.getenv(f"{prefix}_RATE_LIMIT", str(default_limit))),
+        period=float(os.getenv(f"{prefix}_RATE_PERIOD", "60")),
+        burst=int(burst) if burst else None,
+    )
+
+class GCRAStore:
+    """
+    Bounded in-memory GCRA (generic cell rate algorithm) state.
+
+    Each key holds a single float, its theoretical arrival time (TAT), so a check
+    is O(1) and memory per key is constant. Unlike a fixed window there is no
+    boundary at which the full limit resets: the sustained rate never exceeds
+    limit/period and bursts are capped by the policy's burst size. At most
+    `max_keys` keys are tracked; the least recently used are evicted first, and
+    since an idle key's TAT is in the past, evicting it loses no state.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._tat: "OrderedDict[Hashable, float]" = OrderedDict()
+        self.evictions = 0
+
+    def hit(self, key: Hashable, policy: RateLimitPolicy, now: Optional[float] = None) -> bool:
+        """Record a request for key; return True if it is allowed"""
+        now = time.monotonic() if now is None else now
+        tat = self._tat.get(key, now)
+        if tat < now:
+            tat = now
+
+        new_tat = tat + policy.emission_interval
+        if new_tat - now > policy.burst_tolerance:
+            # Rejected requests don't consume capacity
             return False
 
-    def is_ip_rate_limited(self, ip: str, path: str) -> bool:
+        self._tat[key] = new_tat
+        self._tat.move_to_end(key)
+        if len(self._tat) > self.max_keys:
+            self._tat.popitem(last=False)
+            self.evictions += 1
+        return True
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+# Rate limiter with in-memory or Redis-backed state
+class RateLimiter:
+    def __init__(self, max_keys: Optional[int] = None, redis_store: Optional[RedisGCRAStore] = None):
+        # Rate limits from environment variables or defaults (requests per minute)
+        self.policies: Dict[str, RateLimitPolicy] = {
+            "general": _policy_from_env("general", 100),
+            "login": _policy_from_env("login", 5),
+            "api": _policy_from_env("api", 60),
+        }
+        self.general_rate_limit = self.policies["general"].limit
+        self.login_rate_limit = self.policies["login"].limit
+        self.api_rate_limit = self.policies["api"].limit
+
+        # Hard cap on tracked keys (IPs and usernames) so memory stays bounded under scans
+        self.max_keys = max_keys or int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+        self.store = GCRAStore(self.max_keys)
+
+        # Shared Redis state so limits hold across workers; the local store is the fallback
+        storage = os.getenv("RATE_LIMIT_STORAGE", "memory")
+        if redis_store is None and storage == "redis":
+            redis_store = RedisGCRAStore.from_url(
+                os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                timeout=float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", "0.25")),
+                retry_after=float(os.getenv("RATE_LIMIT_REDIS_RETRY", "5")),
+            )
+        self.redis_store = redis_store
+        # "open": fall back to the per-process limiter while Redis is down; "closed": reject
+        self.fail_mode = os.getenv("RATE_LIMIT_FAIL_MODE", "open")
+
+        # Rejections by class
+        self.rejections: Dict[str, int] = {name: 0 for name in self.policies}
+        self.rejections["login_user"] = 0
+
+        logger.info(f"Rate limiter initialized with limits: general={self.general_rate_limit}, login={self.login_rate_limit}, api={self.api_rate_limit}, max_keys={self.max_keys}, storage={'redis' if self.redis_store else 'memory'}")
+
+    async def _hit_many(self, checks: Sequence[Tuple[str, str, RateLimitPolicy]]) -> List[bool]:
+        """Record a request against each (class, identity, policy) bucket; return which allowed it"""
+        if self.redis_store is not None:
+            if self.redis_store.available():
+                try:
+                    return await self.redis_store.hit_many([
+                        (f"{bucket_class}:{identity}", policy.emission_interval * 1000, policy.burst_tolerance * 1000)
+                        for bucket_class, identity, policy in checks
+                    ])
+                except RedisError as e:
+                    self.redis_store.mark_down(e)
+            if self.fail_mode == "closed":
+                return [False] * len(checks)
+
+        return [self.store.hit((bucket_class, identity), policy) for bucket_class, identity, policy in checks]
+
+    async def _is_rate_limited(self, checks: Sequence[Tuple[str, str, RateLimitPolicy]]) -> bool:
+        """Check if any of the buckets is rate limited"""
+        limited = False
+        for (bucket_class, _, _), allowed in zip(checks, await self._hit_many(checks)):
+            if not allowed:
+                self.rejections[bucket_class] += 1
+                limited = True
+        return limited
+
+    async def is_ip_rate_limited(self, ip: str, path: str, path_class: Optional[str] = None) -> bool:
         """Check if an IP is rate limited based on the path"""
         # Different rate limits for different paths
-        if path.startswith("/api/auth/login"):
-            return self._is_rate_limited(f"{ip}:login", self.login_rate_limit, self.requests)
-        elif path.startswith("/api/"):
-            return self._is_rate_limited(f"{ip}:api", self.api_rate_limit, self.requests)
-        else:
-            return self._is_rate_limited(ip, self.general_rate_limit, self.requests)
+        path_class = path_class or classify_path(path).rate_class
+        return await self._is_rate_limited([(path_class, ip, self.policies[path_class])])
+
+    async def is_login_rate_limited(self, username: str, ip: Optional[str] = None) -> bool:
+        """Check if login attempts for a username, and from an IP if given, are rate limited in one call"""
+        checks = [("login_user", username, self.policies["login"])]
+        if ip is not None:
+            checks.insert(0, ("login", ip, self.policies["login"]))
+        return await self._is_rate_limited(checks)
+
+    async def close(self) -> None:
+        if self.redis_store is not None:
+            await self.redis_store.close()
 
-    def is_login_rate_limited(self, username: str) -> bool:
-        """Check if login attempts for a username are rate limited"""
-        return self._is_rate_limited(username, self.login_rate_limit, self.login_attempts)
+    def stats(self) -> Dict[str, object]:
+        """Return tracked key count and rejections by class"""
+        return {
+            "storage": "redis" if self.redis_store else "memory",
+            "redis_available": self.redis_store.available() if self.redis_store else None,
+            "redis_errors": self.redis_store.errors if self.redis_store else 0,
+            "tracked_keys": len(self.store),
+            "max_keys": self.max_keys,
+            "evictions": self.store.evictions,
+            "rejections": dict(self.rejections),
+        }
 
 # Create a global rate limiter instance
 rate_limiter = RateLimiter()
 
-# Middleware dependency
-async def rate_limit_middleware(request: Request, call_next: Callable):
-    """Rate limiting middleware"""
-    # Get client IP
-    client_ip = request.client.host if request.client else "unknown"
-    path = request.url.path
-    
-    # Check if rate limited
-    if rate_limiter.is_ip_rate_limited(client_ip, path):
-        logger.warning(f"Rate limit exceeded for IP {client_ip} on path {path}")
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Too many requests. Please try again later."
-        )
-    
-    # Continue with the request
-    response = await call_next(request)
-    return response
+# Rejections are already counted per class; read them at scrape time
+metrics_registry.collector(
+    "rate_limit_rejections_total", "Requests rejected by the rate limiter by class", "counter",
+    lambda: [("rate_limit_rejections_total", {"class": name}, count) for name, count in rate_limiter.rejections.items()])
+
+async def _read_login_username(scope, receive):
+    """
+    Read a urlencoded login form for its username.
+
+    Returns the username (None if the form isn't urlencoded, too large or has no
+    username) and a receive callable that replays the consumed body to the app.
+    """
+    messages: List[dict] = []
+
+    async def replay():
+        return messages.pop(0) if messages else await receive()
+
+    headers = dict(scope.get("headers") or [])
+    content_type = headers.get(b"content-type", b"").split(b";")[0].strip().lower()
+    if scope["method"] != "POST" or content_type != b"application/x-www-form-urlencoded":
+        return None, replay
+
+    body = b""
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            return None, replay
+        body += message.get("body", b"")
+        if len(body) > LOGIN_FORM_MAX_BYTES:
+            return None, replay
+        if not message.get("more_body", False):
+            break
+
+    usernames = parse_qs(body.decode("utf-8", "replace")).get("username")
+    return (usernames[0] if usernames else None), replay
+
+class RateLimitMiddleware:
+    """ASGI rate limiting middleware"""
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        path_class = get_path_info(scope).rate_class
+
+        # Get client IP
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        path = scope["path"]
+
+        # Login requests are limited per IP whatever their body. When the form gives
+        # the username, its bucket is charged in the same call and the handler
+        # skips its own check (see check_login_rate_limit)
+        username = None
+        if path_class == "login":
+            username, receive = await _read_login_username(scope, receive)
+        if username is not None:
+            scope.setdefault("state", {})["login_rate_limited_username"] = username
+            limited = await self.limiter.is_login_rate_limited(username, client_ip)
+        else:
+            limited = await self.limiter.is_ip_rate_limited(client_ip, path, path_class)
+
+        # Check if rate limited; answer directly rather than raising through the stack
+        if limited:
+            logger.warning(f"Rate limit exceeded for IP {client_ip} on path {path}"
+                           + (f" (username {username})" if username is not None else ""))
+            response = JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={"detail": "Too many requests. Please try again later."}
+            )
+            return await response(scope, receive, send)
+
+        # Continue with the request
+        await self.app(scope, receive, send)
 
 # Login rate limit dependency
-def check_login_rate_limit(username: str):
-    """Check if login attempts for a username are rate limited"""
-    if rate_limiter.is_login_rate_limited(username):
+async def check_login_rate_limit(request: Request, username: str):
+    """Check if login attempts for a username are rate limited, unless the middleware already did"""
+    if getattr(request.state, "login_rate_limited_username", None) == username:
+        return
+    if await rate_limiter.is_login_rate_limited(username):
         logger.warning(f"Login rate limit exceeded for username {username}")
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Too many login attempts. Please try again later."
-        )
\ No newline at end of file
+        )
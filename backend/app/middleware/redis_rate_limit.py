@@ -0,0 +1,79 @@
+import time
+from typing import List, Sequence, Tuple
+from loguru import logger
+from redis import asyncio as aioredis
+
+# GCRA over several buckets in one atomic round trip. Times are in milliseconds
+# from the Redis server clock, so every replica agrees on "now".
+# KEYS: bucket keys; ARGV: emission interval and burst tolerance for each key, in key order.
+# Returns 1 (allowed) or 0 (limited) per key; each bucket is consumed independently.
+GCRA_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + tonumber(time[2]) / 1000
+local results = {}
+for i, key in ipairs(KEYS) do
+    local emission = tonumber(ARGV[i * 2 - 1])
+    local tolerance = tonumber(ARGV[i * 2])
+    local tat = tonumber(redis.call('GET', key)) or now
+    if tat < now then
+        tat = now
+    end
+    local new_tat = tat + emission
+    if new_tat - now > tolerance then
+        results[i] = 0
+    else
+        -- The key expires once its state is back in the past, so idle buckets cost nothing
+        redis.call('SET', key, string.format('%.3f', new_tat), 'PX', math.ceil(new_tat - now))
+        results[i] = 1
+    end
+end
+return results
+"""
+
+class RedisGCRAStore:
+    """
+    Shared GCRA state in Redis so limits hold across workers and replicas.
+
+    All buckets a request hits are checked by one server-side script call. After a
+    Redis error the store reports itself unavailable for `retry_after` seconds so
+    callers fall back without paying a connection timeout on every request.
+    """
+
+    def __init__(self, client: aioredis.Redis, prefix: str = "ratelimit", retry_after: float = 5.0):
+        self.client = client
+        self.prefix = prefix
+        self.retry_after = retry_after
+        self._script = client.register_script(GCRA_SCRIPT)
+        self._down_until = 0.0
+
+        # Metrics
+        self.errors = 0
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 0.25, **kwargs) -> "RedisGCRAStore":
+        client = aioredis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        return cls(client, **kwargs)
+
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def mark_down(self, error: Exception) -> None:
+        self.errors += 1
+        self._down_until = time.monotonic() + self.retry_after
+        logger.error(f"Redis rate limit store unavailable, retrying in {self.retry_after}s: {error}")
+
+    async def hit_many(self, checks: Sequence[Tuple[str, float, float]]) -> List[bool]:
+        """
+        Record a request against each (key, emission_ms, tolerance_ms) bucket.
+
+        Returns whether each bucket allowed it. Raises RedisError when Redis can't be reached.
+        """
+        keys = [f"{self.prefix}:{key}" for key, _, _ in checks]
+        args = []
+        for _, emission, tolerance in checks:
+            args.extend((emission, tolerance))
+        results = await self._script(keys=keys, args=args)
+        return [bool(result) for result in results]
+
+    async def close(self) -> None:
+        await self.client.close()
@@ -0,0 +1,69 @@
+import random
+import time
+from ..core.logging import ACCESS_LOG, ACCESS_LOG_SAMPLE_RATE, access_log_writer
+
+class RequestLoggingMiddleware:
+    """
+    ASGI middleware writing one structured access record per request and adding X-Process-Time.
+
+    Successful (2xx) responses are logged with probability `sample_rate`; every
+    other status is always logged. Each record carries the rate it was sampled at
+    so counts can be scaled back up. Records are handed to access_log_writer, which
+    encodes and writes them off the request path.
+    """
+
+    def __init__(self, app, enabled: bool = ACCESS_LOG, sample_rate: float = ACCESS_LOG_SAMPLE_RATE):
+        self.app = app
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start_time = time.perf_counter()
+        status_code = 500
+        response_bytes = 0
+
+        async def send_with_timing(message):
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Add processing time header
+                process_time = time.perf_counter() - start_time
+                message["headers"] = list(message.get("headers", ())) + [(b"x-process-time", str(process_time).encode())]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if self.enabled:
+                self.log(scope, status_code, time.perf_counter() - start_time, response_bytes)
+
+    def log(self, scope, status_code: int, duration: float, response_bytes: int) -> None:
+        """Emit the access record for a finished request, subject to sampling"""
+        is_success = 200 <= status_code < 300
+        if is_success and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+
+        # Get client info
+        client = scope.get("client")
+        user_agent = None
+        for name, value in scope["headers"]:
+            if name == b"user-agent":
+                user_agent = value.decode("latin-1")
+                break
+
+        access_log_writer.submit({
+            "ts": time.time(),
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 3),
+            "bytes": response_bytes,
+            "client_ip": client[0] if client else None,
+            "user_agent": user_agent,
+            "sample_rate": self.sample_rate if is_success else 1.0,
+        })
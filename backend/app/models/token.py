@@ -1,18 +1,36 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func, Boolean, Index, LargeBinary, text, update
 from sqlalchemy.orm import relationship
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import os
 from ..db.session import Base
+from ..core.token_cache import token_cache
+
+def _as_utc(value):
+    # SQLite hands back naive datetimes even for timezone-aware columns
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
 
 class Token(Base):
     __tablename__ = "tokens"
-    __table_args__ = {"schema": "app_schema"}
+    __table_args__ = (
+        # A user's active sessions: the sessions API lists them newest first and
+        # logout revokes them all. Revoked rows stay out of the index.
+        Index("ix_app_schema_tokens_user_id_active", "user_id", "created_at",
+              postgresql_where=text("NOT is_revoked"), sqlite_where=text("NOT is_revoked")),
+        # Revoked tokens that haven't expired, reloaded by each revocation listener on (re)connect
+        Index("ix_app_schema_tokens_revoked_access_expires", "access_token_expires_at",
+              postgresql_where=text("is_revoked"), sqlite_where=text("is_revoked")),
+        {"schema": "app_schema"},
+    )
+    # Server-generated columns come back with the INSERT (RETURNING) instead of a separate SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("app_schema.users.id", ondelete="CASCADE"), nullable=False)
-    refresh_token = Column(String(255), unique=True, nullable=False, index=True)
-    access_token = Column(String(255), unique=True, nullable=False, index=True)
-    refresh_token_expires_at = Column(DateTime(timezone=True), nullable=False)
+    # Tokens are stored and indexed by a fixed-size digest (see core.security.token_digest)
+    refresh_token_hash = Column(LargeBinary(16), unique=True, nullable=False, index=True)
+    access_token_hash = Column(LargeBinary(16), unique=True, nullable=False, index=True)
+    # Indexed for the expired token reaper (core.token_reaper)
+    refresh_token_expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
     access_token_expires_at = Column(DateTime(timezone=True), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -23,26 +41,30 @@ class Token(Base):
     # Relationship
     user = relationship("User", backref="tokens")
 
+    # Raw tokens are only known when they are created; they are never persisted
+    access_token = None
+    refresh_token = None
+
     @property
     def is_refresh_token_expired(self):
-        return datetime.utcnow() > self.refresh_token_expires_at
+        return datetime.now(timezone.utc) > _as_utc(self.refresh_token_expires_at)
 
     @property
     def is_access_token_expired(self):
-        return datetime.utcnow() > self.access_token_expires_at
+        return datetime.now(timezone.utc) > _as_utc(self.access_token_expires_at)
 
     @classmethod
-    def create_tokens(cls, db, user_id, user_agent=None, ip_address=None):
-        """Create new access and refresh tokens for a user"""
-        from ..core.security import create_access_token, create_refresh_token
+    async def create_tokens(cls, db, user_id, user_agent=None, ip_address=None, commit=True):
+        """Create new access and refresh tokens for a user; with commit=False the caller commits"""
+        from ..core.security import create_access_token, create_refresh_token, token_digest
         
         # Get token expiry times from environment variables
         access_token_expire_minutes = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))
         refresh_token_expire_days = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
         
         # Calculate expiry times
-        access_token_expires = datetime.utcnow() + timedelta(minutes=access_token_expire_minutes)
-        refresh_token_expires = datetime.utcnow() + timedelta(days=refresh_token_expire_days)
+        access_token_expires = datetime.now(timezone.utc) + timedelta(minutes=access_token_expire_minutes)
+        refresh_token_expires = datetime.now(timezone.utc) + timedelta(days=refresh_token_expire_days)
         
         # Create tokens
         access_token = create_access_token(
@@ -57,8 +79,8 @@ class Token(Base):
         # Create token record
         db_token = cls(
             user_id=user_id,
-            access_token=access_token,
-            refresh_token=refresh_token,
+            access_token_hash=token_digest(access_token),
+            refresh_token_hash=token_digest(refresh_token),
             access_token_expires_at=access_token_expires,
             refresh_token_expires_at=refresh_token_expires,
             user_agent=user_agent,
@@ -67,15 +89,30 @@ class Token(Base):
         
         # Add to database
         db.add(db_token)
-        db.commit()
-        db.refresh(db_token)
+        if commit:
+            await db.commit()
         
+        db_token.access_token = access_token
+        db_token.refresh_token = refresh_token
         return db_token
 
     @classmethod
-    def revoke_all_user_tokens(cls, db, user_id):
+    async def revoke_all_user_tokens(cls, db, user_id):
         """Revoke all tokens for a user"""
-        db.query(cls).filter(cls.user_id == user_id, cls.is_revoked == False).update(
-            {"is_revoked": True}
+        from ..core.revocation import publish_revocations, revocation_registry
+        
+        result = await db.execute(
+            update(cls)
+            .where(cls.user_id == user_id, cls.is_revoked == False)
+            .values(is_revoked=True)
+            .returning(cls.access_token_hash, cls.access_token_expires_at)
         )
-        db.commit()
\ No newline at end of file
+        revoked = result.all()
+        
+        # Tell the other workers once the revocation commits
+        await publish_revocations(db, revoked)
+        await db.commit()
+        
+        token_cache.invalidate_user(user_id)
+        for access_token_hash, access_token_expires_at in revoked:
+            revocation_registry.add(access_token_hash, access_token_expires_at)
\ No newline at end of file
@@ -1,14 +1,35 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, func
-from sqlalchemy.sql import expression
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index, func
+from sqlalchemy.sql import expression, text
 from sqlalchemy.ext.hybrid import hybrid_property
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import uuid
-from passlib.hash import argon2
+from ..core.hashing import hash_password, verify_password
 from ..db.session import Base
 
+# Account lockout policy
+MAX_FAILED_LOGIN_ATTEMPTS = 5
+LOCKOUT_DURATION = timedelta(minutes=15)
+
 class User(Base):
     __tablename__ = "users"
-    __table_args__ = {"schema": "app_schema"}
+    __table_args__ = (
+        # Admin user listing (api.admin), paginated on (created_at, id)
+        Index("ix_app_schema_users_created_at_id", "created_at", "id"),
+        Index("ix_app_schema_users_role_created_at_id", "role", "created_at", "id"),
+        # Inactive and locked users are few, so these stay small
+        Index("ix_app_schema_users_inactive_created_at_id", "created_at", "id",
+              postgresql_where=text("NOT is_active"), sqlite_where=text("NOT is_active")),
+        Index("ix_app_schema_users_locked_created_at_id", "created_at", "id",
+              postgresql_where=text("locked_until IS NOT NULL"), sqlite_where=text("locked_until IS NOT NULL")),
+        # Case-insensitive prefix search; text_pattern_ops lets LIKE 'abc%' use the index in any collation
+        Index("ix_app_schema_users_lower_username_pattern", func.lower(text("username")).label("lower_username"),
+              postgresql_ops={"lower_username": "text_pattern_ops"}),
+        Index("ix_app_schema_users_lower_email_pattern", func.lower(text("email")).label("lower_email"),
+              postgresql_ops={"lower_email": "text_pattern_ops"}),
+        {"schema": "app_schema"},
+    )
+    # Server-generated columns come back with the INSERT (RETURNING) instead of a separate SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(50), unique=True, nullable=False, index=True)
@@ -30,34 +51,38 @@ class User(Base):
 
     @password.setter
     def password(self, password):
-        # Use Argon2 for password hashing (more secure than bcrypt)
-        self._hashed_password = argon2.using(
-            time_cost=4,      # Increase time cost for better security
-            memory_cost=65536, # 64MB
-            parallelism=8,    # Use 8 threads
-            salt_len=16,      # 16 bytes salt
-            hash_len=32       # 32 bytes hash
-        ).hash(password)
+        # Blocking Argon2 hash; async handlers should hash on the hashing pool
+        # and assign hashed_password instead
+        self._hashed_password = hash_password(password)
+
+    @property
+    def hashed_password(self):
+        return self._hashed_password
+
+    @hashed_password.setter
+    def hashed_password(self, hashed_password):
+        self._hashed_password = hashed_password
 
     def verify_password(self, password):
-        return argon2.verify(password, self._hashed_password)
+        return verify_password(password, self._hashed_password)
 
     def record_login_attempt(self, success):
+        # Failed attempts are counted atomically in SQL by the login handler (db.queries.RECORD_FAILED_LOGIN)
         if success:
             self.failed_login_attempts = 0
             self.locked_until = None
-            self.last_login = datetime.utcnow()
+            self.last_login = datetime.now(timezone.utc)
         else:
             self.failed_login_attempts += 1
-            # Lock account after 5 failed attempts
-            if self.failed_login_attempts >= 5:
-                # Lock for 15 minutes
-                self.locked_until = datetime.utcnow() + timedelta(minutes=15)
+            if self.failed_login_attempts >= MAX_FAILED_LOGIN_ATTEMPTS:
+                self.locked_until = datetime.now(timezone.utc) + LOCKOUT_DURATION
 
     def is_locked(self):
-        if self.locked_until and self.locked_until > datetime.utcnow():
-            return True
-        return False
+        if not self.locked_until:
+            return False
+        # SQLite hands back naive datetimes even for timezone-aware columns
+        locked_until = self.locked_until if self.locked_until.tzinfo else self.locked_until.replace(tzinfo=timezone.utc)
+        return locked_until > datetime.now(timezone.utc)
 
     def generate_password_reset_token(self):
         return str(uuid.uuid4())
\ No newline at end of file
@@ -1,3 +1,5 @@
 # Pydantic schemas package
 from .user import User, UserCreate, UserUpdate, UserLogin, PasswordReset
-from .token import Token, TokenPayload, RefreshToken
\ No newline at end of file
+from .token import Token, TokenPayload, RefreshToken
+from .sanitize import SanitizeBatch, SanitizeBatchResult
+from .session import Session
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class SanitizeBatch(BaseModel):
+    fragments: List[str] = Field(..., description="HTML fragments to sanitize")
+    policy: str = Field("default", description="Sanitizer policy name")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "fragments": ["<p>Hello <script>alert(1)</script></p>", "<a href='https://example.com'>link</a>"],
+                "policy": "default"
+            }
+        }
+
+class SanitizeBatchResult(BaseModel):
+    sanitized: List[str] = Field(..., description="Sanitized fragments, in input order")
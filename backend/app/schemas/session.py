@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+class Session(BaseModel):
+    """Active session (signed-in device) returned to client"""
+    id: int
+    user_agent: Optional[str] = None
+    ip_address: Optional[str] = None
+    created_at: datetime
+    expires_at: datetime
+    current: bool = Field(False, description="Whether this is the session making the request")
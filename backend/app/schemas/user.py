@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field, validator
 import re
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 # Password validation regex
@@ -64,6 +64,38 @@ class User(UserInDBBase):
     """User model returned to client"""
     pass
 
+class UserBulkCreate(BaseModel):
+    users: List[UserCreate] = Field(..., min_items=1)
+
+class UserCreated(BaseModel):
+    id: int
+    username: str
+
+class UserBulkResult(BaseModel):
+    """Bulk provisioning result returned to client"""
+    created: int
+    users: List[UserCreated]
+    seconds: float
+    users_per_second: float
+
+class UserListItem(BaseModel):
+    """Row of the admin user list"""
+    id: int
+    username: str
+    email: str
+    role: str
+    is_active: bool
+    locked_until: Optional[datetime] = None
+    created_at: datetime
+    last_login: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class UserPage(BaseModel):
+    users: List[UserListItem]
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to get the next page; null on the last page")
+
 class UserLogin(BaseModel):
     username: str
     password: str
@@ -0,0 +1,49 @@
+"""
+Environment and database setup shared by the end-to-end benchmarks.
+
+Import this module before anything from `app`: it sets the environment defaults
+the app reads at import time (rate limits high enough that the benchmark is never
+throttled, quiet logging) and, for a SQLite stand-in database, attaches a second
+database file as `app_schema` on every connection so the schema-qualified models work.
+"""
+import os
+
+for _name in ("GENERAL", "API", "LOGIN"):
+    os.environ.setdefault(f"{_name}_RATE_LIMIT", "1000000000")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("ACCESS_LOG", "false")
+
+from sqlalchemy import event, text
+
+from app.db.session import Base, async_engine, engine
+
+def _attach_app_schema(path: str):
+    def attach(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("ATTACH DATABASE ? AS app_schema", (path,))
+        cursor.execute("PRAGMA app_schema.journal_mode=WAL")
+        cursor.execute("PRAGMA busy_timeout=10000")
+        cursor.close()
+    return attach
+
+IS_SQLITE = engine.dialect.name == "sqlite"
+
+if IS_SQLITE:
+    _database = engine.url.database or ""
+    _schema_path = _database.rsplit(".", 1)[0] + "_app_schema.db" if _database not in ("", ":memory:") else ":memory:"
+    event.listen(engine, "connect", _attach_app_schema(_schema_path))
+    event.listen(async_engine.sync_engine, "connect", _attach_app_schema(_schema_path))
+
+def create_schema() -> None:
+    """Create app_schema and any missing tables (idempotent)"""
+    # Make sure every model is registered on Base
+    from app import models  # noqa: F401
+
+    with engine.begin() as conn:
+        if not IS_SQLITE:
+            conn.execute(text("CREATE SCHEMA IF NOT EXISTS app_schema"))
+        Base.metadata.create_all(bind=conn)
+
+def describe_database() -> str:
+    """Database the benchmark runs against, without credentials"""
+    return engine.url.render_as_string(hide_password=True)
@@ -0,0 +1,318 @@
+"""
+End-to-end benchmark of the auth API: login, refresh, logout, register, the
+authenticated /api/protected route and /api/sanitize with small and large payloads,
+each swept over several concurrency levels. refresh_race sends the same refresh token
+several times in parallel and counts tokens that didn't rotate exactly once as errors;
+register_race does the same with registrations of one username, which must give one
+200 and otherwise 400s. provision creates users through the admin bulk endpoint in
+batches of PROVISION_BATCH and also reports users per second.
+In-process runs also report database round trips (statements, BEGIN, COMMIT and
+ROLLBACK) per request.
+
+By default requests go through the full app in-process (all middleware, real
+database); with --url they go to a running server instead, which must share this
+process's DATABASE_URL and SECRET_KEY. Users and tokens each scenario consumes are
+created directly in the database beforehand (one Argon2 hash per run), so only the
+request under test is timed. Every run uses fresh usernames, so nothing has to be
+reset between runs.
+
+DATABASE_URL may point at Postgres or at a SQLite file as a stand-in; for SQLite a
+second file is attached as app_schema. SQLite serializes writes, so its numbers are
+only useful for comparing code changes, not for capacity planning.
+
+Usage (from the backend directory):
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_auth --concurrency 1,8,32
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.bench_auth --scenarios protected,sanitize_small
+    python -m benchmarks.compare benchmarks/results/auth-baseline.json benchmarks/results/auth.json
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# Must be imported before the app: sets the environment the app reads at import
+from ._setup import create_schema, describe_database
+
+import httpx
+from sqlalchemy import event, insert
+
+from app.core.hashing import hash_password
+from app.db.session import AsyncSessionLocal, async_engine
+from app.models.token import Token as TokenModel
+from app.models.user import User
+from ._common import summarize, write_results
+
+PASSWORD = "Bench@Passw0rd!"
+
+SMALL_HTML = "<p>Hello <b>world</b> <script>alert(1)</script><a href='https://example.com'>link</a></p>"
+LARGE_HTML = (
+    "<div><h2>Section</h2><p>Some <em>text</em> with <a href='https://example.com' onclick='x()'>a link</a>"
+    "<img src=x onerror=alert(1)><script>evil()</script></p><ul><li>one</li><li>two</li></ul></div>"
+) * 400  # ~100 KB
+
+# Scenarios in run order; hash-bound ones use --hash-requests
+SCENARIOS = ["protected", "sanitize_small", "sanitize_large", "refresh", "refresh_race", "logout", "login",
+             "login_failed", "register", "register_race", "provision"]
+HASH_BOUND = {"login", "login_failed", "register", "register_race", "provision"}
+
+# Parallel refreshes sent with each token in the refresh_race scenario, and
+# registrations of each username in register_race
+RACE_WIDTH = 8
+
+# Users per request in the provision scenario
+PROVISION_BATCH = 32
+
+class RoundTrips:
+    """
+    Counts database round trips on the app's async engine: statements plus the
+    BEGIN, COMMIT and ROLLBACK actually sent. The asyncpg adapter sends BEGIN with
+    the first statement of a transaction and neither in autocommit mode, so those
+    are counted from its transaction state; other drivers count statements and
+    COMMIT/ROLLBACK only.
+    """
+
+    def __init__(self):
+        self.count = 0
+        sync_engine = async_engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._statement)
+        event.listen(sync_engine, "commit", self._end)
+        event.listen(sync_engine, "rollback", self._end)
+
+    def _statement(self, conn, *args) -> None:
+        self.count += 1
+        dbapi_connection = conn.connection.dbapi_connection
+        if getattr(dbapi_connection, "_started", True) is False and not dbapi_connection.autocommit:
+            self.count += 1  # BEGIN
+
+    def _end(self, conn) -> None:
+        # Fired before the driver call; asyncpg only sends it inside a transaction
+        if getattr(conn.connection.dbapi_connection, "_started", True):
+            self.count += 1
+
+round_trips = RoundTrips()
+
+class Fixtures:
+    """Users and tokens created directly in the database for one benchmark run"""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.hashed_password = hash_password(PASSWORD)
+        self.created = 0
+
+    async def users(self, count: int, role: str = "practice") -> List[User]:
+        """Insert `count` users sharing one precomputed password hash"""
+        prefix = f"bench-{self.run_id}-{self.created}"
+        self.created += count
+        rows = [
+            {
+                "username": f"{prefix}-{i}",
+                "email": f"{prefix}-{i}@bench.example.com",
+                "_hashed_password": self.hashed_password,
+                "role": role,
+                "failed_login_attempts": 0,
+            }
+            for i in range(count)
+        ]
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(insert(User).returning(User), rows)
+            users = list(result.scalars())
+            await db.commit()
+        return users
+
+    async def tokens(self, users: List[User]) -> List[TokenModel]:
+        """Create one token pair per user the way login does"""
+        tokens = []
+        async with AsyncSessionLocal() as db:
+            for user in users:
+                tokens.append(await TokenModel.create_tokens(db, user.id, user_agent="bench", ip_address="127.0.0.1"))
+        return tokens
+
+async def run_requests(total: int, concurrency: int, request: Callable[[int], Awaitable[httpx.Response]],
+                       expected_status: Optional[int] = 200) -> Dict[str, float]:
+    """Issue total requests at the given concurrency; request(i) performs the i-th"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await request(i)
+            latencies.append(time.perf_counter() - start)
+            if expected_status is not None and response.status_code != expected_status:
+                errors += 1
+
+    start = time.perf_counter()
+    trips_before = round_trips.count
+    await asyncio.gather(*(one(i) for i in range(total)))
+    result = summarize(latencies, time.perf_counter() - start)
+    result["errors"] = errors
+    # Zero against a --url server, whose queries run in another process
+    result["db_round_trips_per_request"] = round((round_trips.count - trips_before) / total, 2) if total else 0.0
+    return result
+
+async def run_scenario(client: httpx.AsyncClient, fixtures: Fixtures, csrf: Dict[str, Dict[str, str]],
+                       scenario: str, total: int, concurrency: int) -> Dict[str, float]:
+    """Prepare what the scenario consumes, then time the requests"""
+    headers, cookies = csrf["headers"], csrf["cookies"]
+
+    if scenario == "register":
+        prefix = f"bench-{fixtures.run_id}-reg-{concurrency}"
+        return await run_requests(total, concurrency, lambda i: client.post(
+            "/api/auth/register",
+            json={"username": f"{prefix}-{i}", "email": f"{prefix}-{i}@bench.example.com", "password": PASSWORD},
+            headers=headers, cookies=cookies,
+        ))
+
+    if scenario == "register_race":
+        # RACE_WIDTH parallel registrations per username; exactly one may succeed, the rest get a 400
+        prefix = f"bench-{fixtures.run_id}-race-{concurrency}"
+        statuses: Dict[int, List[int]] = {}
+
+        async def register(i: int) -> httpx.Response:
+            name = f"{prefix}-{i // RACE_WIDTH}"
+            response = await client.post(
+                "/api/auth/register",
+                json={"username": name, "email": f"{name}@bench.example.com", "password": PASSWORD},
+                headers=headers, cookies=cookies,
+            )
+            statuses.setdefault(i // RACE_WIDTH, []).append(response.status_code)
+            return response
+
+        result = await run_requests(max(total // RACE_WIDTH, 1) * RACE_WIDTH, concurrency, register, expected_status=None)
+        result["errors"] = sum(1 for codes in statuses.values()
+                               if codes.count(200) != 1 or codes.count(400) != len(codes) - 1)
+        return result
+
+    if scenario == "provision":
+        tokens = await fixtures.tokens(await fixtures.users(1, role="admin"))
+        auth = {**headers, "Authorization": f"Bearer {tokens[0].access_token}"}
+        prefix = f"bench-{fixtures.run_id}-prov-{concurrency}"
+        requests = max(total // PROVISION_BATCH, 1)
+        result = await run_requests(requests, concurrency, lambda i: client.post(
+            "/api/admin/users/bulk",
+            json={"users": [
+                {"username": f"{prefix}-{i}-{j}", "email": f"{prefix}-{i}-{j}@bench.example.com", "password": PASSWORD}
+                for j in range(PROVISION_BATCH)
+            ]},
+            headers=auth, cookies=cookies,
+        ))
+        result["users_per_s"] = round(result["throughput_per_s"] * PROVISION_BATCH, 2)
+        return result
+
+    if scenario == "login":
+        users = await fixtures.users(min(total, concurrency * 4))
+        return await run_requests(total, concurrency, lambda i: client.post(
+            "/api/auth/login", data={"username": users[i % len(users)].username, "password": PASSWORD},
+            headers=headers, cookies=cookies,
+        ))
+
+    if scenario == "login_failed":
+        # Wrong passwords, spread so that no account reaches the lockout threshold
+        users = await fixtures.users(max(total // 4, 1))
+        return await run_requests(total, concurrency, lambda i: client.post(
+            "/api/auth/login", data={"username": users[i % len(users)].username, "password": PASSWORD + "x"},
+            headers=headers, cookies=cookies,
+        ), expected_status=401)
+
+    if scenario == "refresh":
+        # Refresh tokens rotate, so each request gets its own
+        tokens = await fixtures.tokens(await fixtures.users(total))
+        return await run_requests(total, concurrency, lambda i: client.post(
+            "/api/auth/refresh", json={"refresh_token": tokens[i].refresh_token}, headers=headers, cookies=cookies,
+        ))
+
+    if scenario == "refresh_race":
+        # RACE_WIDTH parallel refreshes per token; rotation must succeed exactly once for each
+        tokens = await fixtures.tokens(await fixtures.users(max(total // RACE_WIDTH, 1)))
+        statuses: Dict[int, List[int]] = {}
+
+        async def refresh(i: int) -> httpx.Response:
+            token = tokens[i // RACE_WIDTH]
+            response = await client.post(
+                "/api/auth/refresh", json={"refresh_token": token.refresh_token}, headers=headers, cookies=cookies,
+            )
+            statuses.setdefault(i // RACE_WIDTH, []).append(response.status_code)
+            return response
+
+        result = await run_requests(len(tokens) * RACE_WIDTH, concurrency, refresh, expected_status=None)
+        # Errors here are tokens that didn't rotate exactly once
+        result["errors"] = sum(1 for codes in statuses.values() if codes.count(200) != 1)
+        return result
+
+    if scenario == "logout":
+        # Logout revokes every token of the user, so each request gets its own user
+        tokens = await fixtures.tokens(await fixtures.users(total))
+        return await run_requests(total, concurrency, lambda i: client.post(
+            "/api/auth/logout", headers=headers, cookies={**cookies, "access_token": tokens[i].access_token},
+        ))
+
+    # Authenticated reads share a few users; the token cache is part of what is measured
+    tokens = await fixtures.tokens(await fixtures.users(min(concurrency, 16)))
+    auth = [{"Authorization": f"Bearer {token.access_token}"} for token in tokens]
+    if scenario == "protected":
+        return await run_requests(total, concurrency, lambda i: client.get("/api/protected", headers=auth[i % len(auth)]))
+
+    html = SMALL_HTML if scenario == "sanitize_small" else LARGE_HTML
+    return await run_requests(total, concurrency, lambda i: client.post(
+        "/api/sanitize", json={"html": html}, headers=auth[i % len(auth)],
+    ))
+
+def make_client(url: Optional[str]) -> httpx.AsyncClient:
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=60)
+    from app.main import app
+    return httpx.AsyncClient(app=app, base_url="http://bench", timeout=60)
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=500, help="requests per level")
+    parser.add_argument("--hash-requests", type=int, default=64, help="requests per level for login and register")
+    parser.add_argument("--name", default="auth", help="results file name, e.g. auth-baseline")
+    args = parser.parse_args()
+
+    scenarios = [scenario for scenario in args.scenarios.split(",") if scenario]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    create_schema()
+    fixtures = Fixtures(uuid.uuid4().hex[:8])
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+    async with make_client(args.url) as client:
+        response = await client.get("/api/auth/csrf-token")
+        token = response.json()["csrf_token"]
+        # Sent explicitly: the cookie is Secure, so the client won't return it over plain HTTP
+        csrf = {"headers": {"X-CSRF-Token": token}, "cookies": {"csrf_token": token}}
+
+        # Warm up pools and caches on the authenticated path
+        await run_scenario(client, fixtures, csrf, "protected", 50, 8)
+
+        for scenario in scenarios:
+            total = args.hash_requests if scenario in HASH_BOUND else args.requests
+            results[scenario] = {}
+            for level in levels:
+                result = await run_scenario(client, fixtures, csrf, scenario, total, level)
+                results[scenario][f"c{level}"] = result
+                print(f"{scenario:>15} c={level:<4} {result['throughput_per_s']:>9} req/s  "
+                      f"p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  p99 {result['p99_ms']:>8} ms  "
+                      f"db trips {result['db_round_trips_per_request']:>5}  errors {result['errors']}"
+                      + (f"  {result['users_per_s']} users/s" if "users_per_s" in result else ""))
+
+    results["config"] = {
+        "database": describe_database(),
+        "target": args.url or "in-process",
+        "requests": args.requests,
+        "hash_requests": args.hash_requests,
+    }
+    print(f"Results written to {write_results(args.name, results)}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
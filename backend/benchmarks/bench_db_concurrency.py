@@ -0,0 +1,89 @@
+"""
+Concurrent-request throughput of the token validation queries, sync vs async sessions.
+
+"sync" runs the blocking Session queries inline in a coroutine, which is what the
+async route handlers did before the AsyncSession path; "async" uses get_async_db's
+AsyncSessionLocal. Both run the get_current_user lookups (token then user).
+
+Usage (from the backend directory, against a database with the app schema):
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_db_concurrency --requests 2000
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+
+from app.core.security import token_digest
+from app.db.session import SessionLocal, AsyncSessionLocal
+from app.models.user import User
+from app.models.token import Token as TokenModel
+from ._common import summarize, write_results
+
+async def sync_request(token: str, user_id: int) -> None:
+    """Validate a token with the blocking Session, inline on the event loop"""
+    db = SessionLocal()
+    try:
+        db.query(TokenModel.id).filter(TokenModel.access_token_hash == token_digest(token), TokenModel.is_revoked == False).first()
+        db.get(User, user_id)
+    finally:
+        db.close()
+
+async def async_request(token: str, user_id: int) -> None:
+    """Validate a token with the AsyncSession"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            select(TokenModel.id).where(TokenModel.access_token_hash == token_digest(token), TokenModel.is_revoked == False).limit(1)
+        )
+        await db.get(User, user_id)
+
+async def run(mode: str, total: int, concurrency: int) -> dict:
+    """Fire total requests with the given concurrency and measure loop lag alongside"""
+    handler = sync_request if mode == "sync" else async_request
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    lags = []
+    done = asyncio.Event()
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await handler(f"bench-token-{i}", 1)
+            latencies.append(time.perf_counter() - start)
+
+    async def monitor_lag() -> None:
+        # A cheap request like /health should be scheduled every ~1ms; record how late it runs
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    monitor = asyncio.create_task(monitor_lag())
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await monitor
+
+    result = summarize(latencies, elapsed)
+    result["max_loop_lag_ms"] = round(max(lags) * 1000, 3) if lags else 0.0
+    return result
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("sync", "async"):
+        # Warm the pools so connection setup isn't measured
+        await run(mode, args.concurrency, args.concurrency)
+        results[mode] = await run(mode, args.requests, args.concurrency)
+        print(f"{mode:>5}: {results[mode]['throughput_per_s']:>9} req/s  "
+              f"p99 {results[mode]['p99_ms']} ms  max loop lag {results[mode]['max_loop_lag_ms']} ms")
+
+    print(f"Results written to {write_results('db_concurrency', results)}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
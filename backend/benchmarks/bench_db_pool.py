@@ -0,0 +1,116 @@
+"""
+Connection checkout latency under concurrency for each pool configuration, and the
+cost of building the token lookup per call vs executing the prebuilt statement.
+
+Pool configurations, each on its own engine:
+  pre_ping   the previous settings: default pool size with a ping on every checkout
+  direct     the "direct" profile (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT)
+  nullpool   the "pgbouncer" profile's NullPool; pointed straight at Postgres it shows
+             what a connection per checkout costs, through PgBouncer it is the real setup
+
+Each operation checks out a connection (timed as the checkout), runs SELECT 1 and
+holds the connection for --hold-ms to stand in for a request's queries.
+
+Usage (from the backend directory, against a migrated database):
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_db_pool --concurrency 1,16,64
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from app.db.queries import TOKEN_IS_REVOKED
+from app.db.session import ASYNC_DATABASE_URL, engine_options
+from app.models.token import Token as TokenModel
+from ._common import summarize, write_results
+
+def make_engine(config: str) -> AsyncEngine:
+    if config == "pre_ping":
+        return create_async_engine(ASYNC_DATABASE_URL, pool_pre_ping=True, pool_recycle=300)
+    profile = "pgbouncer" if config == "nullpool" else "direct"
+    return create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, profile=profile, pre_ping=False))
+
+async def checkout(engine: AsyncEngine, total: int, concurrency: int, hold: float) -> Dict[str, float]:
+    """Time connection checkouts for total operations at the given concurrency"""
+    semaphore = asyncio.Semaphore(concurrency)
+    checkouts: List[float] = []
+    errors = 0
+
+    async def one() -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async with engine.connect() as conn:
+                    checkouts.append(time.perf_counter() - start)
+                    await conn.execute(text("SELECT 1"))
+                    if hold:
+                        await asyncio.sleep(hold)
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    result = summarize(checkouts, time.perf_counter() - start)
+    result["errors"] = errors
+    return result
+
+async def statements(engine: AsyncEngine, total: int) -> Dict[str, Dict[str, float]]:
+    """Execute the token lookup total times on one connection, built per call vs prebuilt"""
+    digest = bytes(32)
+    runs = {
+        "built_per_call": lambda db: db.execute(
+            select(TokenModel.is_revoked).where(TokenModel.access_token_hash == digest).limit(1)),
+        "prebuilt": lambda db: db.execute(TOKEN_IS_REVOKED, {"access_token_hash": digest}),
+    }
+    results = {}
+    async with AsyncSession(engine) as db:
+        for name, run in runs.items():
+            for _ in range(50):
+                await run(db)
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(total):
+                op_start = time.perf_counter()
+                await run(db)
+                latencies.append(time.perf_counter() - op_start)
+            results[name] = summarize(latencies, time.perf_counter() - start)
+    return results
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--configs", default="pre_ping,direct,nullpool")
+    parser.add_argument("--concurrency", default="1,16,64", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=2000, help="checkouts per level")
+    parser.add_argument("--hold-ms", type=float, default=1.0, help="time each connection is held")
+    parser.add_argument("--statements", type=int, default=5000, help="token lookups per statement mode")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    results: Dict[str, Dict] = {}
+
+    for config in args.configs.split(","):
+        engine = make_engine(config)
+        results[config] = {}
+        # Open the pool's connections before timing
+        await checkout(engine, levels[-1], levels[-1], 0)
+        for level in levels:
+            result = await checkout(engine, args.requests, level, args.hold_ms / 1000)
+            results[config][f"c{level}"] = result
+            print(f"{config:>9} c={level:<4} checkout p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  "
+                  f"p99 {result['p99_ms']:>8} ms  {result['throughput_per_s']:>9} ops/s  errors {result['errors']}")
+        await engine.dispose()
+
+    engine = make_engine("direct")
+    results["statements"] = await statements(engine, args.statements)
+    await engine.dispose()
+    for name, result in results["statements"].items():
+        print(f"{name:>15} mean {result['mean_ms']:>7} ms  p50 {result['p50_ms']:>7} ms  p99 {result['p99_ms']:>7} ms")
+
+    print(f"Results written to {write_results('db_pool', results)}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
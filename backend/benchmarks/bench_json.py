@@ -0,0 +1,100 @@
+"""
+Encode time per response type, from the handler's return value to the response body.
+
+Modes:
+  default   response_model validation and jsonable_encoder, then JSONResponse (FAST_JSON off)
+  orjson    the same pass, rendered by ORJSONResponse (default_response_class alone)
+  prebuilt  the content straight into ORJSONResponse, as json_response() does with FAST_JSON
+
+Response types are the payloads of /health, /, /api/protected, the token pair from
+login and refresh, and the user from registration. Every mode's body is checked to
+decode to the same JSON as the default.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_json --iterations 20000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.responses import USER_FIELDS
+from app.models.user import User
+from app.schemas.token import Token
+from app.schemas.user import User as UserSchema
+from ._common import summarize, write_results
+
+def payloads() -> Dict[str, Dict[str, Any]]:
+    """Each response type's handler return value, prebuilt content and response model"""
+    now = datetime.now(timezone.utc)
+    timestamp = datetime.utcnow().isoformat()
+    token = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9." + "x" * 160
+    tokens = {"access_token": token, "refresh_token": token + "y", "token_type": "bearer"}
+    user = User(id=1, username="alice", email="alice@example.com", full_name="Alice Example", role="practice",
+                is_active=True, created_at=now, updated_at=now, last_login=None)
+    return {
+        "health": {"content": {"status": "ok", "timestamp": timestamp}},
+        "root": {"content": {"message": "Portfolio API", "docs": "/docs", "redoc": "/redoc", "timestamp": timestamp}},
+        "protected": {"content": {"message": "This is a protected endpoint", "user": "alice", "timestamp": timestamp}},
+        "token": {"content": tokens, "model": Token},
+        "user": {"content": user, "prebuilt": {field: getattr(user, field) for field in USER_FIELDS},
+                 "model": UserSchema},
+    }
+
+def run_sync(coroutine: Any) -> Any:
+    """Run a coroutine that never suspends (serialize_response in an async handler) without an event loop"""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("coroutine suspended")
+
+def measure(run: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        op_start = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - op_start)
+    return summarize(latencies, time.perf_counter() - start)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000, help="encodes per mode and response type")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+    for name, payload in payloads().items():
+        model = payload.get("model")
+        field = create_response_field(name=f"Response_{name}", type_=model) if model else None
+        content = payload["content"]
+        prebuilt = payload.get("prebuilt", content)
+
+        def encoded(response_class: type, field: Optional[Any] = field, content: Any = content) -> bytes:
+            body = run_sync(serialize_response(field=field, response_content=content))
+            return response_class(body).body
+
+        modes = {
+            "default": lambda: encoded(JSONResponse),
+            "orjson": lambda: encoded(ORJSONResponse),
+            "prebuilt": lambda prebuilt=prebuilt: ORJSONResponse(prebuilt).body,
+        }
+        expected = json.loads(modes["default"]())
+        results[name] = {}
+        for mode, run in modes.items():
+            assert json.loads(run()) == expected, f"{name} {mode} body differs"
+            result = measure(run, args.iterations)
+            results[name][mode] = result
+            print(f"{name:>9} {mode:>8}  mean {result['mean_ms'] * 1000:>6.0f} us  "
+                  f"p50 {result['p50_ms'] * 1000:>6.0f} us  p99 {result['p99_ms'] * 1000:>6.0f} us")
+
+    print(f"Results written to {write_results('json', results)}")
+
+if __name__ == "__main__":
+    main()
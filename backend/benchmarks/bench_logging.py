@@ -0,0 +1,114 @@
+"""
+Per-request cost of request logging: the old two-line synchronous logging vs the
+structured access log written from a background thread, with and without sampling.
+
+Each scenario wraps a trivial ASGI app and writes to real files in a temporary
+directory, with the same rotation and compression settings as production. The
+console sink goes to a file as well, so terminal speed is not measured. Overhead is
+the time per request minus the time for the same app with no logging.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_logging --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from loguru import logger
+
+from app.core.logging import access_log_writer, setup_logging
+from app.middleware.request_logging import RequestLoggingMiddleware
+from ._common import asgi_request, write_results
+
+async def hello_app(scope, receive, send):
+    """Smallest possible endpoint so logging dominates the measurement"""
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+class SyncLoggingMiddleware:
+    """The previous log_requests: two f-string lines through synchronous sinks"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        start_time = time.time()
+        client_ip = scope["client"][0]
+        logger.info(f"Request: {scope['method']} {scope['path']} from {client_ip} (bench)")
+        await self.app(scope, receive, send)
+        process_time = time.time() - start_time
+        logger.info(f"Response: {scope['method']} {scope['path']} - Status: 200 - Time: {process_time:.4f}s")
+
+def sync_sinks(stream, directory: str) -> None:
+    """The sinks main.py configured before the access log: both written on the calling thread"""
+    logger.remove()
+    logger.add(
+        stream,
+        colorize=True,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level="INFO",
+    )
+    logger.add(
+        os.path.join(directory, "app.log"),
+        rotation="10 MB",
+        retention="30 days",
+        compression="zip",
+        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
+        level="INFO",
+    )
+
+async def run(app, total: int) -> float:
+    """Return seconds per request, sequentially so it measures CPU on the request path"""
+    for _ in range(min(total, 1000)):
+        await asgi_request(app, "/health")
+    start = time.perf_counter()
+    for _ in range(total):
+        await asgi_request(app, "/health")
+    return (time.perf_counter() - start) / total
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    scenarios = {
+        "sync_two_lines": (SyncLoggingMiddleware, {}),
+        "queued_json": (RequestLoggingMiddleware, {"sample_rate": 1.0}),
+        "queued_json_sampled_10pct": (RequestLoggingMiddleware, {"sample_rate": 0.1}),
+    }
+
+    logger.remove()
+    baseline = await run(hello_app, args.requests)
+    results = {"no_logging_us": round(baseline * 1e6, 2)}
+    print(f"{'no logging':>28}: {baseline * 1e6:8.2f} us/request")
+
+    for name, (middleware, kwargs) in scenarios.items():
+        with tempfile.TemporaryDirectory() as directory, open(os.path.join(directory, "stdout.log"), "w") as stream:
+            if middleware is SyncLoggingMiddleware:
+                sync_sinks(stream, directory)
+            else:
+                setup_logging(stream, os.path.join(directory, "app.log"), os.path.join(directory, "access.log"))
+            dropped = access_log_writer.dropped
+            per_request = await run(middleware(hello_app, **kwargs), args.requests)
+
+            # Time to drain what was queued; off the request path, reported for completeness
+            start = time.perf_counter()
+            access_log_writer.stop(timeout=60)
+            await logger.complete()
+            drain = time.perf_counter() - start
+            logger.remove()
+
+        results[name] = {
+            "us_per_request": round(per_request * 1e6, 2),
+            "overhead_us": round((per_request - baseline) * 1e6, 2),
+            "drain_s": round(drain, 4),
+            "dropped_records": access_log_writer.dropped - dropped,
+        }
+        print(f"{name:>28}: {per_request * 1e6:8.2f} us/request  overhead {results[name]['overhead_us']:8.2f} us  drain {drain:.3f}s  dropped {results[name]['dropped_records']}")
+
+    print(f"Results written to {write_results('logging', results)}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+"""
+Per-request overhead of the middleware stack, pure ASGI vs @app.middleware("http").
+
+Requests are driven straight through the ASGI interface (no server or HTTP client),
+so the numbers isolate what the stack adds. "bare" has no middleware, "decorator"
+rebuilds the previous four @app.middleware("http") layers (each one a
+BaseHTTPMiddleware with its own task and response stream), and "asgi" uses the
+app's middleware classes, with and without MetricsMiddleware. /api/protected has get_current_user overridden so no
+database is needed.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_middleware --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+# Limits high enough that the benchmark itself is never rate limited
+for _name in ("GENERAL", "API"):
+    os.environ.setdefault(f"{_name}_RATE_LIMIT", "1000000000")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from fastapi import Depends, FastAPI, Request
+from loguru import logger
+
+from app.core.security import get_current_user
+from app.middleware.csrf import CSRFMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.rate_limiter import RateLimiter, RateLimitMiddleware
+from app.middleware.request_logging import RequestLoggingMiddleware
+from app.middleware.security_headers import SECURITY_HEADERS, SecurityHeadersMiddleware
+from ._common import asgi_request, summarize, write_results
+
+class BenchUser:
+    username = "bench"
+
+def build_app(stack: str) -> FastAPI:
+    """Build a small app with /health and /api/protected behind the given stack"""
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/api/protected")
+    async def protected(current_user=Depends(get_current_user)):
+        return {"user": current_user.username}
+
+    app.dependency_overrides[get_current_user] = lambda: BenchUser()
+    limiter = RateLimiter()
+
+    if stack.startswith("asgi"):
+        app.add_middleware(RateLimitMiddleware, limiter=limiter)
+        app.add_middleware(CSRFMiddleware)
+        app.add_middleware(RequestLoggingMiddleware)
+        app.add_middleware(SecurityHeadersMiddleware)
+        if stack == "asgi+metrics":
+            app.add_middleware(MetricsMiddleware)
+    elif stack == "decorator":
+        # The same work done the way main.py did before the ASGI middlewares
+        @app.middleware("http")
+        async def rate_limiting(request: Request, call_next):
+            if request.url.path.startswith("/api/auth/login"):
+                return await call_next(request)
+            await limiter.is_ip_rate_limited(request.client.host if request.client else "unknown", request.url.path)
+            return await call_next(request)
+
+        @app.middleware("http")
+        async def csrf_protection(request: Request, call_next):
+            return await call_next(request)
+
+        @app.middleware("http")
+        async def log_requests(request: Request, call_next):
+            start_time = time.time()
+            logger.info(f"Request: {request.method} {request.url.path}")
+            response = await call_next(request)
+            process_time = time.time() - start_time
+            logger.info(f"Response: {request.method} {request.url.path} - Status: {response.status_code}")
+            response.headers["X-Process-Time"] = str(process_time)
+            return response
+
+        @app.middleware("http")
+        async def add_security_headers(request: Request, call_next):
+            response = await call_next(request)
+            for name, value in SECURITY_HEADERS:
+                response.headers[name.decode()] = value.decode()
+            return response
+
+    return app
+
+async def run(app: FastAPI, path: str, total: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            status_code = await asgi_request(app, path)
+            latencies.append(time.perf_counter() - start)
+            assert status_code == 200, status_code
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return summarize(latencies, time.perf_counter() - start)
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    # Measure the stack, not log sinks
+    logger.remove()
+
+    results = {}
+    for stack in ("bare", "decorator", "asgi", "asgi+metrics"):
+        app = build_app(stack)
+        for path in ("/health", "/api/protected"):
+            await run(app, path, args.concurrency, args.concurrency)
+            result = await run(app, path, args.requests, args.concurrency)
+            results[f"{stack} {path}"] = result
+            print(f"{stack:>12} {path:<15} {result['throughput_per_s']:>10} req/s  p99 {result['p99_ms']} ms")
+
+    print(f"Results written to {write_results('middleware', results)}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
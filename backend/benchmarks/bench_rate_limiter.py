@@ -0,0 +1,54 @@
+"""
+Micro-benchmark of the in-memory rate limiter: checks/sec and bytes per tracked key.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_rate_limiter --keys 100000 --checks 1000000
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from app.middleware.rate_limiter import RateLimiter
+from ._common import write_results
+
+async def bench_checks(limiter: RateLimiter, checks: int, keys: int) -> float:
+    """Return checks/sec spreading checks over `keys` distinct IPs"""
+    ips = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(keys)]
+    start = time.perf_counter()
+    for i in range(checks):
+        await limiter.is_ip_rate_limited(ips[i % keys], "/api/protected")
+    return checks / (time.perf_counter() - start)
+
+def bench_memory(keys: int) -> float:
+    """Return bytes per tracked key"""
+    ips = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(keys)]
+    limiter = RateLimiter(max_keys=keys)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for ip in ips:
+        limiter.store.hit(("api", ip), limiter.policies["api"])
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    grown = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return grown / keys
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=100000)
+    parser.add_argument("--checks", type=int, default=1000000)
+    args = parser.parse_args()
+
+    results = {
+        "hot_key_checks_per_s": round(asyncio.run(bench_checks(RateLimiter(), args.checks, 1))),
+        "spread_checks_per_s": round(asyncio.run(bench_checks(RateLimiter(max_keys=args.keys), args.checks, args.keys))),
+        # Twice as many keys as the cap, so every check evicts
+        "evicting_checks_per_s": round(asyncio.run(bench_checks(RateLimiter(max_keys=args.keys // 2), args.checks, args.keys))),
+        "bytes_per_key": round(bench_memory(args.keys), 1),
+    }
+    for name, value in results.items():
+        print(f"{name:>24}: {value}")
+    print(f"Results written to {write_results('rate_limiter', results)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+HTML sanitization cost for small and large documents.
+
+Modes:
+  bleach_clean  bleach.clean() with the allowlists passed per call (the previous sanitize_html)
+  cleaner       the sanitizer's reused per-thread Cleaner, cache disabled
+  cache_hit     the same document again, answered from the digest-keyed cache
+
+Every mode's output is checked against bleach.clean().
+
+Then the event loop's responsiveness while a batch of --batch fragments of
+--batch-size characters is sanitized, with a 5 ms ticker standing in for other
+requests on the worker:
+  inline     sanitize_html() called in the handler (the previous /api/sanitize)
+  threads    SanitizePool with the process pool disabled
+  processes  SanitizePool with SANITIZE_PROCESSES workers
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_sanitize --sizes 200,100000,1000000
+"""
+import argparse
+import asyncio
+import time
+from typing import Callable, Dict, List
+
+import bleach
+
+from app.core.sanitizer import DEFAULT_POLICY, SANITIZE_PROCESSES, HTMLSanitizer, SanitizePool
+from ._common import summarize, write_results
+
+FRAGMENT = (
+    "<div><h2>Section</h2><p>Some <em>text</em> with <a href='https://example.com' onclick='x()'>a link</a>"
+    "<img src=x onerror=alert(1)><script>evil()</script></p><ul><li>one</li><li>two</li></ul></div>"
+)
+
+def document(size: int) -> str:
+    """Roughly size characters of editor-like HTML"""
+    return (FRAGMENT * (size // len(FRAGMENT) + 1))[:size]
+
+def bleach_clean(content: str) -> str:
+    return bleach.clean(
+        content, tags=list(DEFAULT_POLICY.tags), attributes=dict(DEFAULT_POLICY.attributes), strip=True,
+    )
+
+def measure(run: Callable[[], str], iterations: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        op_start = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - op_start)
+    return summarize(latencies, time.perf_counter() - start)
+
+async def loop_lag(fragments: List[str], config: str) -> Dict[str, float]:
+    """Sanitize fragments under one configuration while measuring how late a 5 ms ticker wakes up"""
+    sanitizer = HTMLSanitizer(max_size=0)
+    pool = SanitizePool(sanitizer, processes=SANITIZE_PROCESSES if config == "processes" else 0,
+                        process_min_bytes=0, max_fragments=len(fragments), max_bytes=sum(map(len, fragments)))
+    if config == "processes":
+        await pool.clean_many(["<p>warm up</p>"] * SANITIZE_PROCESSES)
+
+    lags: List[float] = []
+    done = False
+
+    async def ticker() -> None:
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - start - 0.005)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.02)
+    start = time.perf_counter()
+    if config == "inline":
+        for fragment in fragments:
+            sanitizer.clean(fragment)
+    else:
+        await pool.clean_many(fragments)
+    elapsed = time.perf_counter() - start
+    done = True
+    await task
+    pool.shutdown()
+
+    return summarize(lags, elapsed)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="200,100000,1000000", help="document sizes in characters")
+    parser.add_argument("--budget", type=float, default=2.0, help="approximate seconds per uncached mode and size")
+    parser.add_argument("--batch", type=int, default=50, help="fragments in the loop lag batch")
+    parser.add_argument("--batch-size", type=int, default=20000, help="characters per fragment in the loop lag batch")
+    args = parser.parse_args()
+
+    uncached = HTMLSanitizer(max_size=0)
+    cached = HTMLSanitizer(max_bytes=64 * 1024 * 1024)
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+    for size in (int(size) for size in args.sizes.split(",")):
+        content = document(size)
+        expected = bleach_clean(content)
+        assert uncached.clean(content) == expected
+        assert cached.clean(content) == expected  # also fills the cache
+
+        # Size the run from one timed call
+        start = time.perf_counter()
+        bleach_clean(content)
+        iterations = max(3, min(2000, int(args.budget / (time.perf_counter() - start))))
+
+        modes = {
+            "bleach_clean": lambda: bleach_clean(content),
+            "cleaner": lambda: uncached.clean(content),
+            "cache_hit": lambda: cached.clean(content),
+        }
+        results[f"{size}"] = {}
+        for mode, run in modes.items():
+            result = measure(run, iterations)
+            results[f"{size}"][mode] = result
+            print(f"{size:>8} chars {mode:>12}  mean {result['mean_ms']:>10} ms  p50 {result['p50_ms']:>10} ms  "
+                  f"p99 {result['p99_ms']:>10} ms  ({iterations} runs)")
+
+    fragments = [document(args.batch_size) + f"<p>{i}</p>" for i in range(args.batch)]
+    results["loop_lag"] = {}
+    for config in ("inline", "threads", "processes"):
+        result = asyncio.run(loop_lag(fragments, config))
+        results["loop_lag"][config] = result
+        print(f"{config:>9} batch {args.batch}x{args.batch_size}  {result['elapsed_s']:>7}s  "
+              f"loop lag p50 {result['p50_ms']:>8} ms  p99 {result['p99_ms']:>8} ms  max {result['max_ms']:>8} ms")
+
+    print(f"Results written to {write_results('sanitize', results)}")
+
+if __name__ == "__main__":
+    main()
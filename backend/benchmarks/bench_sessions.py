@@ -0,0 +1,123 @@
+"""
+Session listing and logout-all latency as the tokens table grows, with and without
+the partial (user_id, created_at) WHERE NOT is_revoked index.
+
+The table is filled up to each size in turn with generate_series (Postgres only):
+tokens spread over --users users, nine in ten of them revoked as they would be after
+rotations and logouts. Then, for one user:
+  list        the sessions API query (db.queries.ACTIVE_SESSIONS)
+  logout_all  the UPDATE of Token.revoke_all_user_tokens, rolled back after each run
+"without_index" runs the same with the index dropped inside a transaction that is
+rolled back, so use a dedicated database. The plan's scan type is printed for each.
+
+Usage (from the backend directory, against a dedicated migrated database):
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_sessions --sizes 100000,1000000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Dict, List
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.queries import ACTIVE_SESSIONS
+from app.db.session import async_engine
+from app.models.token import Token as TokenModel
+from app.models.user import User
+from ._common import summarize, write_results
+
+# Rows inserted per statement while filling the table
+FILL_BATCH = 100000
+
+async def fill(conn: AsyncConnection, target: int, users: int, run_id: str) -> List[int]:
+    """Add tokens until the table has target rows; return the user ids they belong to"""
+    user_ids = list((await conn.execute(
+        select(User.id).where(User.username.like(f"sb{run_id}_%")).order_by(User.id)
+    )).scalars())
+    if not user_ids:
+        await conn.execute(text("""
+            INSERT INTO app_schema.users (username, email, hashed_password, role, failed_login_attempts)
+            SELECT 'sb' || :run || '_' || n, 'sb' || :run || '_' || n || '@bench.example.com', 'x', 'practice', 0
+            FROM generate_series(1, :users) AS n
+        """), {"run": run_id, "users": users})
+        user_ids = list((await conn.execute(
+            select(User.id).where(User.username.like(f"sb{run_id}_%")).order_by(User.id)
+        )).scalars())
+
+    count = (await conn.execute(select(func.count()).select_from(TokenModel))).scalar_one()
+    while count < target:
+        batch = min(FILL_BATCH, target - count)
+        await conn.execute(text("""
+            INSERT INTO app_schema.tokens
+                (user_id, refresh_token_hash, access_token_hash, refresh_token_expires_at,
+                 access_token_expires_at, is_revoked, user_agent, ip_address)
+            SELECT :first_user + (n % :users), decode(md5('r' || :run || (:start + n)), 'hex'),
+                   decode(md5('a' || :run || (:start + n)), 'hex'), now() + interval '7 days',
+                   now() + interval '15 minutes', n % 10 <> 0, 'bench', '127.0.0.1'
+            FROM generate_series(1, :batch) AS n
+        """), {"run": run_id, "start": count, "batch": batch, "first_user": user_ids[0], "users": len(user_ids)})
+        count += batch
+    await conn.execute(text("ANALYZE app_schema.tokens"))
+    return user_ids
+
+async def plan(conn: AsyncConnection, statement) -> str:
+    """Scan nodes of the statement's plan"""
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    rows = (await conn.execute(text(f"EXPLAIN {compiled}"))).scalars()
+    return ", ".join(sorted({row.strip().lstrip("-> ").split(" on ")[0] for row in rows if " on " in row}))
+
+async def measure(conn: AsyncConnection, statement, iterations: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        savepoint = await conn.begin_nested()
+        op_start = time.perf_counter()
+        (await conn.execute(statement)).all()
+        latencies.append(time.perf_counter() - op_start)
+        await savepoint.rollback()
+    return summarize(latencies, time.perf_counter() - start)
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100000,1000000", help="token table sizes to measure at")
+    parser.add_argument("--users", type=int, default=10000, help="users the tokens are spread over")
+    parser.add_argument("--iterations", type=int, default=50, help="executions per query, size and variant")
+    args = parser.parse_args()
+
+    run_id = uuid.uuid4().hex[:6]
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+    for size in (int(size) for size in args.sizes.split(",")):
+        async with async_engine.begin() as conn:
+            user_ids = await fill(conn, size, args.users, run_id)
+        user_id = user_ids[len(user_ids) // 2]
+        queries = {
+            "list": ACTIVE_SESSIONS.params(user_id=user_id, limit=100),
+            "logout_all": update(TokenModel.__table__)
+                .where(TokenModel.user_id == user_id, TokenModel.is_revoked == False)
+                .values(is_revoked=True)
+                .returning(TokenModel.access_token_hash, TokenModel.access_token_expires_at),
+        }
+
+        results[f"{size}"] = {}
+        for variant in ("with_index", "without_index"):
+            async with async_engine.connect() as conn:
+                transaction = await conn.begin()
+                if variant == "without_index":
+                    await conn.execute(text("DROP INDEX app_schema.ix_app_schema_tokens_user_id_active"))
+                for name, statement in queries.items():
+                    scans = await plan(conn, statement)
+                    result = await measure(conn, statement, args.iterations)
+                    result["plan"] = scans
+                    results[f"{size}"][f"{name}_{variant}"] = result
+                    print(f"{size:>8} tokens {name:>10} {variant:>13}  p50 {result['p50_ms']:>9} ms  "
+                          f"p99 {result['p99_ms']:>9} ms  {scans}")
+                await transaction.rollback()
+
+    await async_engine.dispose()
+    print(f"Results written to {write_results('sessions', results)}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""
+Cold start: import-to-ready time and first-request latency, with and without warm-up.
+
+Each sample is a fresh Python process that imports app.main, runs the lifespan
+startup (schema check, optional warm-up) and then times its first requests: an
+authenticated GET /api/protected (first database connection and JWT decode) and a
+registration (first Argon2 hash). The user and token it needs are created by this
+parent process beforehand so the child's pools start cold.
+
+Usage (from the backend directory, against a migrated database):
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_startup --samples 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+def child() -> None:
+    """Runs in the fresh process; prints one JSON sample"""
+    start = time.perf_counter()
+    from app.main import app
+    import_seconds = time.perf_counter() - start
+
+    import httpx
+    # Registers the SQLite app_schema attach before the first connection
+    from . import _setup  # noqa: F401
+
+    async def measure():
+        timings = {"import_s": import_seconds}
+        async with app.router.lifespan_context(app):
+            timings["import_to_ready_s"] = time.perf_counter() - start
+            async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+                headers = {"Authorization": f"Bearer {os.environ['BENCH_ACCESS_TOKEN']}"}
+                for label in ("first_protected_ms", "second_protected_ms"):
+                    request_start = time.perf_counter()
+                    response = await client.get("/api/protected", headers=headers)
+                    timings[label] = (time.perf_counter() - request_start) * 1000
+                    assert response.status_code == 200, response.text
+
+                token = (await client.get("/api/auth/csrf-token")).json()["csrf_token"]
+                username = f"bench-start-{uuid.uuid4().hex[:12]}"
+                request_start = time.perf_counter()
+                response = await client.post(
+                    "/api/auth/register",
+                    json={"username": username, "email": f"{username}@bench.example.com", "password": "Bench@Passw0rd!"},
+                    headers={"X-CSRF-Token": token}, cookies={"csrf_token": token},
+                )
+                timings["first_register_ms"] = (time.perf_counter() - request_start) * 1000
+                assert response.status_code == 200, response.text
+        print(json.dumps(timings))
+
+    asyncio.run(measure())
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=5, help="processes per mode")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    # Children must verify the tokens this process signs
+    os.environ.setdefault("SECRET_KEY", secrets.token_hex(32))
+
+    from ._setup import create_schema
+    from ._common import write_results
+    from .bench_auth import Fixtures
+
+    async def access_token() -> str:
+        fixtures = Fixtures(uuid.uuid4().hex[:8])
+        tokens = await fixtures.tokens(await fixtures.users(1))
+        return tokens[0].access_token
+
+    create_schema()
+    env = {
+        **os.environ,
+        "BENCH_ACCESS_TOKEN": asyncio.run(access_token()),
+        "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+        "ACCESS_LOG": "false",
+    }
+
+    results = {}
+    for warmup in ("false", "true"):
+        samples = []
+        for _ in range(args.samples):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+                env={**env, "WARMUP": warmup}, capture_output=True, text=True, check=True,
+            ).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+
+        mode = "warmup" if warmup == "true" else "cold"
+        results[mode] = {key: round(statistics.median(sample[key] for sample in samples), 4) for key in samples[0]}
+        print(f"{mode:>6}: " + "  ".join(f"{key} {value}" for key, value in results[mode].items()))
+
+    print(f"Results written to {write_results('startup', results)}")
+
+if __name__ == "__main__":
+    main()
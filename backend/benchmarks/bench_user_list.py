@@ -0,0 +1,97 @@
+"""
+Admin user listing page latency as the users table grows.
+
+The table is filled up to each size in turn (rows are added with generate_series,
+so this needs Postgres), then each query is timed on the app's async engine:
+  first      the first page
+  keyset     a page halfway through the table, from its cursor
+  offset     the same page with OFFSET, for comparison
+  role       a keyset page halfway through, filtered on role
+  search     a username prefix search
+
+Usage (from the backend directory, against a dedicated migrated database):
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_user_list --sizes 10000,100000,1000000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Dict, List
+
+from sqlalchemy import func, select, text
+
+from app.api.admin import USER_PAGE_SIZE, user_list_query
+from app.db.session import AsyncSessionLocal, async_engine
+from app.models.user import User
+from ._common import summarize, write_results
+
+# Rows inserted per statement while filling the table
+FILL_BATCH = 100000
+
+async def fill(target: int, run_id: str) -> None:
+    """Add users until the table has target rows; one in five is an admin, one in fifty inactive"""
+    async with AsyncSessionLocal() as db:
+        count = (await db.execute(select(func.count()).select_from(User))).scalar_one()
+        while count < target:
+            batch = min(FILL_BATCH, target - count)
+            await db.execute(text("""
+                INSERT INTO app_schema.users
+                    (username, email, hashed_password, role, is_active, failed_login_attempts, created_at, updated_at)
+                SELECT 'lb' || :run || '_' || (:start + n), 'lb' || :run || '_' || (:start + n) || '@bench.example.com',
+                       'x', CASE WHEN n % 5 = 0 THEN 'admin' ELSE 'practice' END, n % 50 <> 0, 0,
+                       now() - (:start + n) * interval '1 second', now()
+                FROM generate_series(1, :batch) AS n
+            """), {"run": run_id, "start": count, "batch": batch})
+            await db.commit()
+            count += batch
+        await db.execute(text("ANALYZE app_schema.users"))
+        await db.commit()
+
+async def measure(statement, iterations: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    async with AsyncSessionLocal() as db:
+        await db.execute(statement)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            op_start = time.perf_counter()
+            (await db.execute(statement)).all()
+            latencies.append(time.perf_counter() - op_start)
+    return summarize(latencies, time.perf_counter() - start)
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="table sizes to measure at")
+    parser.add_argument("--iterations", type=int, default=200, help="executions per query and size")
+    args = parser.parse_args()
+
+    run_id = uuid.uuid4().hex[:6]
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+    for size in (int(size) for size in args.sizes.split(",")):
+        await fill(size, run_id)
+        depth = size // 2
+        async with AsyncSessionLocal() as db:
+            middle = (await db.execute(
+                select(User.created_at, User.id).order_by(User.created_at.desc(), User.id.desc()).offset(depth).limit(1)
+            )).one()
+            prefix = (await db.execute(select(User.username).offset(depth).limit(1))).scalar_one()[:-2]
+        after = (middle.created_at, middle.id)
+
+        queries = {
+            "first": user_list_query(USER_PAGE_SIZE + 1),
+            "keyset": user_list_query(USER_PAGE_SIZE + 1, after),
+            "offset": user_list_query(USER_PAGE_SIZE + 1).offset(depth),
+            "role": user_list_query(USER_PAGE_SIZE + 1, after, role="admin"),
+            "search": user_list_query(USER_PAGE_SIZE + 1, search=prefix),
+        }
+        results[f"{size}"] = {}
+        for name, statement in queries.items():
+            result = await measure(statement, args.iterations)
+            results[f"{size}"][name] = result
+            print(f"{size:>8} rows {name:>7}  p50 {result['p50_ms']:>9} ms  p99 {result['p99_ms']:>9} ms")
+
+    await async_engine.dispose()
+    print(f"Results written to {write_results('user_list', results)}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
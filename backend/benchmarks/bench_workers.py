@@ -0,0 +1,114 @@
+"""
+Throughput scaling of the production server (gunicorn_conf.py) from 1 to N workers.
+
+For each worker count a gunicorn server is started on --port with WEB_CONCURRENCY set,
+then --clients load generator processes, each keeping --concurrency requests in flight
+over keep-alive connections, hit --path for --duration seconds. The load generators
+run on the same machine and compete with the workers for CPU, so leave cores for them
+(or point --url at a server on another host and skip the sweep).
+
+Usage (from the backend directory, against a migrated database):
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_workers --workers 1,2,4 --path /health
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+from ._common import summarize, write_results
+
+def client(url: str, concurrency: int, duration: float) -> Tuple[List[float], int]:
+    """One load generator process: request latencies and error count"""
+    async def run() -> Tuple[List[float], int]:
+        latencies: List[float] = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=30) as http:
+            async def loop() -> None:
+                nonlocal errors
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    try:
+                        response = await http.get(url)
+                        if response.status_code != 200:
+                            errors += 1
+                    except httpx.HTTPError:
+                        errors += 1
+                    latencies.append(time.perf_counter() - start)
+            await asyncio.gather(*(loop() for _ in range(concurrency)))
+        return latencies, errors
+    return asyncio.run(run())
+
+def load(url: str, clients: int, concurrency: int, duration: float) -> Dict[str, float]:
+    """Run the load generators in parallel and combine their results"""
+    with multiprocessing.get_context("spawn").Pool(clients) as pool:
+        start = time.perf_counter()
+        outputs = pool.starmap(client, [(url, concurrency, duration)] * clients)
+        elapsed = time.perf_counter() - start
+    latencies = [latency for output in outputs for latency in output[0]]
+    result = summarize(latencies, elapsed)
+    result["errors"] = sum(output[1] for output in outputs)
+    return result
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port), MAX_REQUESTS="0")
+    env.setdefault("LOG_LEVEL", "WARNING")
+    env.setdefault("ACCESS_LOG", "false")
+    for name in ("GENERAL", "API"):
+        env.setdefault(f"{name}_RATE_LIMIT", "1000000000")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "app.main:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    # Ready once every worker could have answered
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                time.sleep(1 + workers * 0.5)
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"server with {workers} workers did not start")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}", help="comma-separated worker counts")
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--url", help="load an already running server instead of starting one per worker count")
+    parser.add_argument("--clients", type=int, default=2, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight per load generator")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per worker count")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, float]] = {}
+    counts = ["external"] if args.url else [int(count) for count in dict.fromkeys(args.workers.split(","))]
+    for count in counts:
+        server = None if args.url else start_server(count, args.port)
+        try:
+            url = f"{args.url or f'http://127.0.0.1:{args.port}'}{args.path}"
+            result = load(url, args.clients, args.concurrency, args.duration)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=60)
+        results[f"w{count}"] = result
+        print(f"workers {count:>8}  {result['throughput_per_s']:>9} req/s  p50 {result['p50_ms']:>8} ms  "
+              f"p99 {result['p99_ms']:>8} ms  errors {result['errors']}")
+
+    results["config"] = {"path": args.path, "clients": args.clients, "concurrency": args.concurrency,
+                         "duration": args.duration, "cpus": os.cpu_count()}
+    print(f"Results written to {write_results('workers', results)}")
+
+if __name__ == "__main__":
+    main()
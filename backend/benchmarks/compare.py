@@ -0,0 +1,49 @@
+"""
+Compare two benchmark result files, e.g. a baseline run against the current one.
+
+Prints throughput and p99 latency for every measurement present in both files,
+with the relative change.
+
+Usage (from the backend directory):
+    python -m benchmarks.compare benchmarks/results/auth-baseline.json benchmarks/results/auth.json
+"""
+import argparse
+import json
+from typing import Any, Dict, Iterator, Tuple
+
+def measurements(results: Dict[str, Any], prefix: str = "") -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (path, summary) for each summarize() dict nested in the results"""
+    for key, value in results.items():
+        if isinstance(value, dict):
+            if "throughput_per_s" in value:
+                yield prefix + key, value
+            else:
+                yield from measurements(value, f"{prefix}{key} ")
+
+def change(baseline: float, current: float) -> str:
+    if not baseline:
+        return "n/a"
+    return f"{(current - baseline) / baseline * 100:+.1f}%"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = dict(measurements(json.load(f)["results"]))
+    with open(args.current) as f:
+        current = dict(measurements(json.load(f)["results"]))
+
+    print(f"{'measurement':<32} {'req/s':>21} {'':>8} {'p99 ms':>21} {'':>8}")
+    for name, summary in current.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]
+        print(f"{name:<32} {before['throughput_per_s']:>10} -> {summary['throughput_per_s']:<8} "
+              f"{change(before['throughput_per_s'], summary['throughput_per_s']):>8} "
+              f"{before['p99_ms']:>10} -> {summary['p99_ms']:<8} {change(before['p99_ms'], summary['p99_ms']):>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Production server settings: gunicorn managing uvicorn workers.
+
+    gunicorn -c gunicorn_conf.py app.main:app
+
+Each worker is a separate process with its own event loop, so the app uses every
+core. In-process state is per worker:
+  - rate limits: use RATE_LIMIT_STORAGE=redis to share them
+  - the token cache: a revocation made in one worker only reaches the others'
+    caches through the revocation listener (REVOCATION_BROADCAST=true). Without
+    it, the cache is turned off when there is more than one worker, unless
+    TOKEN_CACHE_SIZE is set explicitly
+  - /metrics: each scrape is answered by whichever worker accepts it, so the
+    counters are that worker's alone
+The app is imported once in the master and forked (PRELOAD), so workers share the
+imported code and module data copy-on-write; nothing connects to the database or
+starts request-path threads at import. The log sinks are enqueued, so with PRELOAD
+the master's writer thread does every write and rotation for all workers. Without
+PRELOAD each worker writes its own log files, suffixed with its pid.
+
+Graceful restarts: SIGHUP starts new workers and stops the old ones, SIGTERM stops
+all of them. A worker that is told to stop accepts no new connections and gets
+GRACEFUL_TIMEOUT seconds to finish the requests it has, then runs the app's
+shutdown. Workers are also recycled after MAX_REQUESTS requests, with jitter so
+they don't all restart at once.
+"""
+import gc
+import os
+
+# Workers: one event loop per usable core, within the container's CPU quota
+def cpu_limit() -> int:
+    """Cores this process may use: its CPU affinity, capped by a cgroup quota"""
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:  # cgroup v2, e.g. "200000 100000"
+            quota, period = f.read().split()
+        if quota != "max":
+            cores = min(cores, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 0))  # workers, 0 to size from the CPUs
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", 0))  # cap on the derived worker count, 0 for none
+workers = WEB_CONCURRENCY or cpu_limit()
+if MAX_WORKERS and not WEB_CONCURRENCY:
+    workers = min(workers, MAX_WORKERS)
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Listening socket
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+backlog = int(os.getenv("BACKLOG", 2048))
+keepalive = int(os.getenv("KEEPALIVE", 5))  # seconds an idle keep-alive connection stays open
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")  # proxies trusted for X-Forwarded-*
+
+# Worker lifecycle
+timeout = int(os.getenv("WORKER_TIMEOUT", 60))  # seconds without a heartbeat before a worker is killed
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 30))  # seconds to drain connections on restart/stop
+max_requests = int(os.getenv("MAX_REQUESTS", 10000))  # recycle workers after this many requests, 0 never
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", max_requests // 10))
+worker_tmp_dir = os.getenv("WORKER_TMP_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else None)  # heartbeat files
+
+# Import the app once in the master and fork it into the workers
+preload_app = os.getenv("PRELOAD", "true").lower() in ("1", "true", "yes")
+
+# Cached tokens must not outlive a revocation made by another worker
+REVOCATION_BROADCAST = os.getenv("REVOCATION_BROADCAST", "false").lower() in ("1", "true", "yes")
+if workers > 1 and not REVOCATION_BROADCAST:
+    os.environ.setdefault("TOKEN_CACHE_SIZE", "0")
+
+# The app writes its own access log (ACCESS_LOG); gunicorn logs errors only
+accesslog = None
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+def on_starting(server):
+    if workers <= 1:
+        return
+    if os.getenv("RATE_LIMIT_STORAGE", "memory") != "redis":
+        server.log.warning(f"Rate limits are per worker with {workers} workers; set RATE_LIMIT_STORAGE=redis to share them")
+    if not REVOCATION_BROADCAST:
+        if os.environ["TOKEN_CACHE_SIZE"] != "0":
+            server.log.warning(f"Token cache is on with {workers} workers and REVOCATION_BROADCAST off; other workers "
+                               f"may accept a revoked token for up to TOKEN_CACHE_TTL seconds")
+        else:
+            server.log.warning(f"Token cache disabled with {workers} workers; set REVOCATION_BROADCAST=true to enable it")
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the collector's generations, so a
+    # collection in a worker doesn't write to (and copy) the shared pages
+    gc.freeze()
+
+def post_fork(server, worker):
+    # Without PRELOAD the worker imports the app and sets up its own sinks after
+    # this; give it files of its own so no two processes rotate the same file
+    if not preload_app:
+        for name, default in (("LOG_FILE", "logs/app.log"), ("ACCESS_LOG_FILE", "logs/access.log")):
+            root, extension = os.path.splitext(os.getenv(name, default))
+            os.environ[name] = f"{root}.{os.getpid()}{extension}"
@@ -1,5 +1,8 @@
+import os
 import uvicorn
 from app.main import app
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # Development server; production runs gunicorn with gunicorn_conf.py
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000,
+                reload=os.getenv("RELOAD", "false").lower() in ("1", "true", "yes"))
\ No newline at end of file
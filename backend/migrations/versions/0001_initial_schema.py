@@ -0,0 +1,64 @@
+"""Initial schema: users and tokens
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SCHEMA IF NOT EXISTS app_schema")
+
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('username', sa.String(50), nullable=False),
+        sa.Column('email', sa.String(100), nullable=False),
+        sa.Column('hashed_password', sa.String(100), nullable=False),
+        sa.Column('full_name', sa.String(100)),
+        sa.Column('role', sa.String(20), nullable=False),
+        sa.Column('is_active', sa.Boolean(), server_default=sa.true(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('last_login', sa.DateTime(timezone=True)),
+        sa.Column('failed_login_attempts', sa.Integer(), nullable=False),
+        sa.Column('locked_until', sa.DateTime(timezone=True)),
+        schema='app_schema',
+    )
+    op.create_index('ix_app_schema_users_id', 'users', ['id'], schema='app_schema')
+    op.create_index('ix_app_schema_users_username', 'users', ['username'], unique=True, schema='app_schema')
+    op.create_index('ix_app_schema_users_email', 'users', ['email'], unique=True, schema='app_schema')
+
+    op.create_table(
+        'tokens',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('app_schema.users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('refresh_token', sa.String(255), nullable=False),
+        sa.Column('access_token', sa.String(255), nullable=False),
+        sa.Column('refresh_token_expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('access_token_expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('is_revoked', sa.Boolean(), nullable=False),
+        sa.Column('user_agent', sa.String(255)),
+        sa.Column('ip_address', sa.String(45)),
+        schema='app_schema',
+    )
+    op.create_index('ix_app_schema_tokens_id', 'tokens', ['id'], schema='app_schema')
+    op.create_index('ix_app_schema_tokens_refresh_token', 'tokens', ['refresh_token'], unique=True, schema='app_schema')
+    op.create_index('ix_app_schema_tokens_access_token', 'tokens', ['access_token'], unique=True, schema='app_schema')
+
+
+def downgrade() -> None:
+    op.drop_table('tokens', schema='app_schema')
+    op.drop_table('users', schema='app_schema')
@@ -0,0 +1,87 @@
+"""Store and index token digests instead of raw JWTs
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+Replaces the String(255) access_token/refresh_token columns and their unique
+indexes with 16-byte BLAKE2b digests (bytea). Existing rows are backfilled
+from their raw tokens, so issued tokens stay valid across the upgrade.
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# Must match app.core.security.token_digest
+DIGEST_SIZE = 16
+BATCH_SIZE = 1000
+
+tokens = sa.table(
+    'tokens',
+    sa.column('id', sa.Integer),
+    sa.column('access_token', sa.String),
+    sa.column('refresh_token', sa.String),
+    sa.column('access_token_hash', sa.LargeBinary),
+    sa.column('refresh_token_hash', sa.LargeBinary),
+    schema='app_schema',
+)
+
+
+def digest(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=DIGEST_SIZE).digest()
+
+
+def upgrade() -> None:
+    op.add_column('tokens', sa.Column('access_token_hash', sa.LargeBinary(DIGEST_SIZE)), schema='app_schema')
+    op.add_column('tokens', sa.Column('refresh_token_hash', sa.LargeBinary(DIGEST_SIZE)), schema='app_schema')
+
+    # Backfill digests in id order, one batch at a time
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(tokens.c.id, tokens.c.access_token, tokens.c.refresh_token)
+            .where(tokens.c.id > last_id)
+            .order_by(tokens.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            tokens.update()
+            .where(tokens.c.id == sa.bindparam('row_id'))
+            .values(access_token_hash=sa.bindparam('access_digest'), refresh_token_hash=sa.bindparam('refresh_digest')),
+            [
+                {'row_id': row.id, 'access_digest': digest(row.access_token), 'refresh_digest': digest(row.refresh_token)}
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+    op.alter_column('tokens', 'access_token_hash', nullable=False, schema='app_schema')
+    op.alter_column('tokens', 'refresh_token_hash', nullable=False, schema='app_schema')
+    op.create_index('ix_app_schema_tokens_access_token_hash', 'tokens', ['access_token_hash'], unique=True, schema='app_schema')
+    op.create_index('ix_app_schema_tokens_refresh_token_hash', 'tokens', ['refresh_token_hash'], unique=True, schema='app_schema')
+
+    # Dropping the raw columns drops their indexes too
+    op.drop_column('tokens', 'access_token', schema='app_schema')
+    op.drop_column('tokens', 'refresh_token', schema='app_schema')
+
+
+def downgrade() -> None:
+    # Raw tokens can't be recovered from digests; existing sessions are dropped
+    op.execute("DELETE FROM app_schema.tokens")
+    op.add_column('tokens', sa.Column('access_token', sa.String(255), nullable=False), schema='app_schema')
+    op.add_column('tokens', sa.Column('refresh_token', sa.String(255), nullable=False), schema='app_schema')
+    op.create_index('ix_app_schema_tokens_access_token', 'tokens', ['access_token'], unique=True, schema='app_schema')
+    op.create_index('ix_app_schema_tokens_refresh_token', 'tokens', ['refresh_token'], unique=True, schema='app_schema')
+    op.drop_column('tokens', 'access_token_hash', schema='app_schema')
+    op.drop_column('tokens', 'refresh_token_hash', schema='app_schema')
@@ -0,0 +1,33 @@
+"""Index tokens by refresh token expiry
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+The expired token reaper deletes rows in expiry order. The index is built
+concurrently on Postgres so logins and refreshes aren't blocked while it builds.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_app_schema_tokens_refresh_token_expires_at', 'tokens', ['refresh_token_expires_at'],
+            schema='app_schema', postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_app_schema_tokens_refresh_token_expires_at', table_name='tokens',
+            schema='app_schema', postgresql_concurrently=True,
+        )
@@ -0,0 +1,63 @@
+"""Index users for the admin user listing
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+The listing pages on (created_at, id) with optional role, inactive and locked
+filters, and searches lower(username) and lower(email) by prefix. The indexes
+are built concurrently on Postgres so logins and registrations aren't blocked
+while they build.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_app_schema_users_created_at_id', 'users', ['created_at', 'id'],
+            schema='app_schema', postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_app_schema_users_role_created_at_id', 'users', ['role', 'created_at', 'id'],
+            schema='app_schema', postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_app_schema_users_inactive_created_at_id', 'users', ['created_at', 'id'],
+            schema='app_schema', postgresql_concurrently=True,
+            postgresql_where=sa.text('NOT is_active'),
+        )
+        op.create_index(
+            'ix_app_schema_users_locked_created_at_id', 'users', ['created_at', 'id'],
+            schema='app_schema', postgresql_concurrently=True,
+            postgresql_where=sa.text('locked_until IS NOT NULL'),
+        )
+        op.create_index(
+            'ix_app_schema_users_lower_username_pattern', 'users', [sa.text('lower(username) text_pattern_ops')],
+            schema='app_schema', postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_app_schema_users_lower_email_pattern', 'users', [sa.text('lower(email) text_pattern_ops')],
+            schema='app_schema', postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in (
+            'ix_app_schema_users_lower_email_pattern',
+            'ix_app_schema_users_lower_username_pattern',
+            'ix_app_schema_users_locked_created_at_id',
+            'ix_app_schema_users_inactive_created_at_id',
+            'ix_app_schema_users_role_created_at_id',
+            'ix_app_schema_users_created_at_id',
+        ):
+            op.drop_index(name, table_name='users', schema='app_schema', postgresql_concurrently=True)
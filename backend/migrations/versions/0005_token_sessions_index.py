@@ -0,0 +1,36 @@
+"""Index active tokens by user
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+
+Listing a user's sessions and revoking them all on logout filter tokens on
+user_id and NOT is_revoked, which scanned the whole table. The partial index
+only holds unrevoked rows, and it is built concurrently on Postgres.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_app_schema_tokens_user_id_active', 'tokens', ['user_id', 'created_at'],
+            schema='app_schema', postgresql_concurrently=True,
+            postgresql_where=sa.text('NOT is_revoked'),
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_app_schema_tokens_user_id_active', table_name='tokens',
+            schema='app_schema', postgresql_concurrently=True,
+        )
@@ -0,0 +1,37 @@
+"""Index revoked tokens by access token expiry
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00
+
+Every revocation listener reloads the revoked, unexpired access tokens on each
+(re)connect, filtering on is_revoked and access_token_expires_at, which scanned
+the whole table. The partial index only holds revoked rows, and it is built
+concurrently on Postgres.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_app_schema_tokens_revoked_access_expires', 'tokens', ['access_token_expires_at'],
+            schema='app_schema', postgresql_concurrently=True,
+            postgresql_where=sa.text('is_revoked'),
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_app_schema_tokens_revoked_access_expires', table_name='tokens',
+            schema='app_schema', postgresql_concurrently=True,
+        )
@@ -0,0 +1,47 @@
+"""
+Backend tests. Tests that need Postgres use the `migrated_db` fixture: they run
+against DATABASE_URL, which must point at a dedicated database, and are skipped
+when it isn't a postgresql:// URL. The database is migrated to head first.
+"""
+import asyncio
+import os
+import time
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(scope="session")
+def migrated_db():
+    """Skip unless Postgres is configured; otherwise bring its schema to head"""
+    if not os.getenv("DATABASE_URL", "").startswith("postgresql"):
+        pytest.skip("DATABASE_URL does not point at Postgres")
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    command.upgrade(config, "head")
+
+@pytest.fixture
+async def db_engine(migrated_db):
+    """The app's async engine, disposed after the test so no connection outlives its event loop"""
+    from app.db.session import async_engine
+    yield async_engine
+    await async_engine.dispose()
+
+@pytest.fixture
+def eventually():
+    """Poll a condition until it holds or `timeout` seconds pass; returns whether it held"""
+    async def wait(predicate, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(0.02)
+        return True
+    return wait
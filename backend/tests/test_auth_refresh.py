@@ -0,0 +1,79 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import delete, func, insert, select
+
+from app.core.security import token_digest
+from app.db.session import AsyncSessionLocal
+from app.main import app
+from app.models.token import Token
+from app.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+# Races run per test; the losing refresh must be rejected every time
+ROUNDS = 5
+
+@pytest.fixture
+async def user_id(db_engine):
+    suffix = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        user_id = (await db.execute(
+            insert(User.__table__).values(username=f"rf_{suffix}", email=f"rf_{suffix}@example.com",
+                                          hashed_password="x", role="practice", failed_login_attempts=0)
+            .returning(User.__table__.c.id)
+        )).scalar_one()
+        await db.commit()
+    yield user_id
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+
+@pytest.fixture
+async def client():
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        csrf_token = (await client.get("/api/auth/csrf-token")).json()["csrf_token"]
+        client.headers["X-CSRF-Token"] = csrf_token
+        client.cookies.set("csrf_token", csrf_token)
+        yield client
+
+async def count_tokens(user_id: int, **filters) -> int:
+    async with AsyncSessionLocal() as db:
+        query = select(func.count()).select_from(Token).where(Token.user_id == user_id)
+        for name, value in filters.items():
+            query = query.where(getattr(Token, name) == value)
+        return (await db.execute(query)).scalar_one()
+
+async def test_concurrent_refresh_rotates_once(client, user_id):
+    for _ in range(ROUNDS):
+        async with AsyncSessionLocal() as db:
+            issued = await Token.create_tokens(db, user_id)
+        tokens_before = await count_tokens(user_id)
+        active_before = await count_tokens(user_id, is_revoked=False)
+
+        # Both requests hold their own connection and race on the same row
+        responses = await asyncio.gather(*(
+            client.post("/api/auth/refresh", json={"refresh_token": issued.refresh_token}) for _ in range(2)
+        ))
+
+        assert sorted(response.status_code for response in responses) == [200, 401]
+        winner = next(response for response in responses if response.status_code == 200).json()
+
+        # Exactly one new token row replaced the presented one
+        assert await count_tokens(user_id) == tokens_before + 1
+        assert await count_tokens(user_id, is_revoked=False) == active_before
+        assert await count_tokens(user_id, is_revoked=True, refresh_token_hash=token_digest(issued.refresh_token)) == 1
+        assert await count_tokens(user_id, is_revoked=False,
+                                  refresh_token_hash=token_digest(winner["refresh_token"])) == 1
+
+async def test_rotated_refresh_token_cannot_be_reused(client, user_id):
+    async with AsyncSessionLocal() as db:
+        issued = await Token.create_tokens(db, user_id)
+
+    first = await client.post("/api/auth/refresh", json={"refresh_token": issued.refresh_token})
+    assert first.status_code == 200
+    again = await client.post("/api/auth/refresh", json={"refresh_token": issued.refresh_token})
+    assert again.status_code == 401
+    assert await count_tokens(user_id) == 2
@@ -0,0 +1,31 @@
+import pytest
+from fastapi.exceptions import RequestValidationError
+from loguru import logger
+from sqlalchemy.exc import OperationalError
+
+from app.db.session import get_async_db
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def errors():
+    """ERROR records logged during the test"""
+    records = []
+    handler_id = logger.add(records.append, level="ERROR", format="{message}")
+    yield records
+    logger.remove(handler_id)
+
+async def raise_into_session(exc: Exception) -> None:
+    # What FastAPI does to a yield dependency when the request fails after it was entered
+    dependency = get_async_db()
+    await dependency.__anext__()
+    with pytest.raises(type(exc)):
+        await dependency.athrow(exc)
+
+async def test_request_errors_are_not_logged_as_database_errors(errors):
+    await raise_into_session(RequestValidationError([]))
+    assert errors == []
+
+async def test_database_errors_are_logged(errors):
+    await raise_into_session(OperationalError("SELECT 1", {}, Exception("connection lost")))
+    assert len(errors) == 1 and "Async database session error" in errors[0]
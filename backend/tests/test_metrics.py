@@ -0,0 +1,56 @@
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+
+from app.core import metrics, security
+from app.core.metrics import MetricsRegistry
+
+pytestmark = pytest.mark.anyio
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        metrics._Metric("name", "documentation")
+
+def test_render_counter_and_histogram():
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requests", ("route",)).labels("/a").inc()
+    registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)).labels().observe(0.5)
+
+    lines = registry.render().splitlines()
+    assert 'requests_total{route="/a"} 1' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 0' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 1' in lines
+    assert "latency_seconds_sum 0.5" in lines
+
+@pytest.mark.parametrize("ip, allowed", [
+    ("127.0.0.1", True),
+    ("::ffff:127.0.0.1", True),
+    ("10.1.2.3", True),
+    ("192.168.1.1", False),
+    ("testclient", False),
+])
+async def test_metrics_allow_list(monkeypatch, ip, allowed):
+    monkeypatch.setattr(security, "METRICS_NETWORKS", [
+        security.ipaddress.ip_network("127.0.0.1"), security.ipaddress.ip_network("10.0.0.0/8"),
+    ])
+    app = FastAPI()
+
+    @app.get("/metrics", dependencies=[Depends(security.require_metrics_access)])
+    async def scrape():
+        return {}
+
+    transport = httpx.ASGITransport(app=app, client=(ip, 1234))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/metrics")
+    assert response.status_code == (200 if allowed else 403)
+
+def test_token_cache_counters_are_exported():
+    from app.core.metrics import metrics_registry
+    from app.core.token_cache import token_cache
+
+    def sample(name):
+        return next(float(line.split()[1]) for line in metrics_registry.render().splitlines() if line.startswith(name + " "))
+
+    misses = sample("token_cache_misses_total")
+    token_cache.get(b"not cached")
+    assert sample("token_cache_misses_total") == misses + 1
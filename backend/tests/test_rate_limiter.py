@@ -0,0 +1,152 @@
+import fakeredis
+import httpx
+import pytest
+from fakeredis import aioredis as fake_aioredis
+from fastapi import HTTPException, Request, status
+from fastapi.responses import JSONResponse
+
+from app.middleware import rate_limiter as rate_limiter_module
+from app.middleware.rate_limiter import (GCRAStore, RateLimiter, RateLimitMiddleware, RateLimitPolicy,
+                                         check_login_rate_limit)
+from app.middleware.redis_rate_limit import RedisGCRAStore
+
+pytestmark = pytest.mark.anyio
+
+LOGIN_POLICY = RateLimitPolicy("login", limit=3, period=60)
+
+@pytest.fixture
+def redis_store():
+    return RedisGCRAStore(fake_aioredis.FakeRedis(server=fakeredis.FakeServer()))
+
+@pytest.fixture(params=["memory", "redis"])
+def limiter(request, redis_store):
+    """A limiter with a 3 per minute login policy, on local or (fake) Redis state"""
+    limiter = RateLimiter(redis_store=redis_store if request.param == "redis" else None)
+    limiter.policies["login"] = LOGIN_POLICY
+    return limiter
+
+def test_gcra_allows_burst_then_sustained_rate():
+    store = GCRAStore(max_keys=10)
+    policy = RateLimitPolicy("test", limit=5, period=60)
+
+    assert [store.hit("ip", policy, now=0.0) for _ in range(6)] == [True] * 5 + [False]
+    # Rejected requests don't consume capacity: one slot frees up per emission interval
+    assert not store.hit("ip", policy, now=11.9)
+    assert store.hit("ip", policy, now=12.0)
+    assert not store.hit("ip", policy, now=12.0)
+    # Idle for a whole period, the full burst is back
+    assert [store.hit("ip", policy, now=200.0) for _ in range(6)] == [True] * 5 + [False]
+
+def test_gcra_burst_smaller_than_limit():
+    store = GCRAStore(max_keys=10)
+    policy = RateLimitPolicy("test", limit=60, period=60, burst=2)
+
+    assert [store.hit("ip", policy, now=0.0) for _ in range(3)] == [True, True, False]
+    assert store.hit("ip", policy, now=1.0)
+
+def test_gcra_keys_are_independent_and_bounded():
+    store = GCRAStore(max_keys=2)
+    policy = RateLimitPolicy("test", limit=1, period=60)
+
+    assert store.hit("a", policy, now=0.0)
+    assert not store.hit("a", policy, now=0.0)
+    assert store.hit("b", policy, now=0.0)
+    assert store.hit("c", policy, now=0.0)
+    # "a" was least recently used and is evicted, so it starts over
+    assert len(store) == 2 and store.evictions == 1
+    assert store.hit("a", policy, now=0.0)
+
+async def test_redis_script_limits_each_bucket(redis_store):
+    emission, tolerance = 20000.0, 60000.0  # 3 per minute, in milliseconds
+
+    results = [await redis_store.hit_many([("login:ip", emission, tolerance)]) for _ in range(4)]
+    assert results == [[True], [True], [True], [False]]
+
+    # Buckets checked in one call are consumed independently
+    assert await redis_store.hit_many([("login:ip", emission, tolerance), ("login_user:alice", emission, tolerance)]) \
+        == [False, True]
+    ttl = await redis_store.client.pttl("ratelimit:login_user:alice")
+    assert 0 < ttl <= emission
+
+async def test_redis_down_fails_open_or_closed(redis_store):
+    limiter = RateLimiter(redis_store=redis_store)
+    limiter.policies["api"] = RateLimitPolicy("api", limit=1, period=60)
+    redis_store.mark_down(ConnectionError("down"))
+
+    # Open: the per-process limiter takes over
+    assert not await limiter.is_ip_rate_limited("1.2.3.4", "/api/x")
+    assert await limiter.is_ip_rate_limited("1.2.3.4", "/api/x")
+
+    limiter.fail_mode = "closed"
+    assert await limiter.is_ip_rate_limited("5.6.7.8", "/api/x")
+
+def login_app(limiter: RateLimiter):
+    """The middleware in front of a stand-in login handler that reads the form like the real one"""
+    async def handler(scope, receive, send):
+        request = Request(scope, receive)
+        username = (await request.form()).get("username")
+        if username is None:
+            # Rejected before the handler's username check, like a form validation error
+            response = JSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content={})
+        else:
+            try:
+                await check_login_rate_limit(request, username)
+                response = JSONResponse(content={"username": username})
+            except HTTPException as e:
+                response = JSONResponse(status_code=e.status_code, content={})
+        await response(scope, receive, send)
+    return RateLimitMiddleware(handler, limiter)
+
+@pytest.fixture
+def store_calls(limiter, monkeypatch):
+    """Route check_login_rate_limit to the test limiter and count its store round trips"""
+    monkeypatch.setattr(rate_limiter_module, "rate_limiter", limiter)
+    calls = []
+    hit_many = limiter._hit_many
+
+    async def counted(checks):
+        calls.append([bucket_class for bucket_class, _, _ in checks])
+        return await hit_many(checks)
+    monkeypatch.setattr(limiter, "_hit_many", counted)
+    return calls
+
+def client_from(app, ip: str) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app, client=(ip, 1234)), base_url="http://test")
+
+async def test_login_ip_limited_even_when_invalid(limiter, store_calls):
+    async with client_from(login_app(limiter), "10.0.0.1") as client:
+        codes = [(await client.post("/api/auth/login")).status_code for _ in range(4)]
+    assert codes == [422, 422, 422, 429]
+
+async def test_login_limited_by_ip_across_usernames(limiter, store_calls):
+    async with client_from(login_app(limiter), "10.0.0.2") as client:
+        codes = [(await client.post("/api/auth/login", data={"username": f"user{i}"})).status_code
+                 for i in range(4)]
+    assert codes == [200, 200, 200, 429]
+
+async def test_login_limited_by_username_across_ips(limiter, store_calls):
+    app = login_app(limiter)
+    codes = []
+    for i in range(4):
+        async with client_from(app, f"10.0.1.{i}") as client:
+            codes.append((await client.post("/api/auth/login", data={"username": "alice"})).status_code)
+    assert codes == [200, 200, 200, 429]
+    assert limiter.rejections["login_user"] == 1 and limiter.rejections["login"] == 0
+
+async def test_login_form_charges_both_buckets_in_one_call(limiter, store_calls):
+    async with client_from(login_app(limiter), "10.0.2.1") as client:
+        response = await client.post("/api/auth/login", data={"username": "bob", "password": "x"})
+    # The handler still sees the body the middleware read
+    assert response.json() == {"username": "bob"}
+    assert store_calls == [["login", "login_user"]]
+
+async def test_multipart_login_is_limited_by_the_handler(limiter, store_calls):
+    app = login_app(limiter)
+    codes = []
+    for i in range(4):
+        async with client_from(app, f"10.0.3.{i}") as client:
+            response = await client.post("/api/auth/login", files={"username": (None, "carol")})
+            codes.append(response.status_code)
+    assert codes == [200, 200, 200, 429]
+    # Unread by the middleware, so the username costs the handler a second call
+    assert store_calls[:2] == [["login"], ["login_user"]]
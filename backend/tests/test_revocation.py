@@ -0,0 +1,175 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from sqlalchemy import delete, insert, text, update
+
+from app.core import revocation, security
+from app.core.revocation import RevocationRegistry, publish_revocations
+from app.core.security import token_digest
+from app.core.token_cache import token_cache
+from app.db.session import AsyncSessionLocal
+from app.main import app
+from app.models.token import Token
+from app.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def channel(monkeypatch):
+    """A channel of its own, with publishing turned on and quick reconnects"""
+    name = f"test_revocations_{uuid.uuid4().hex[:8]}"
+    monkeypatch.setattr(revocation, "REVOCATION_BROADCAST", True)
+    monkeypatch.setattr(revocation, "REVOCATION_CHANNEL", name)
+    monkeypatch.setattr(revocation, "REVOCATION_PING_INTERVAL", 0.05)
+    monkeypatch.setattr(revocation, "REVOCATION_RECONNECT_DELAY", 0.2)
+    return name
+
+@pytest.fixture
+async def listener(db_engine, channel, eventually):
+    """A started registry, synced with the database"""
+    registry = RevocationRegistry(enabled=True, channel=channel)
+    await registry.start()
+    try:
+        assert await eventually(lambda: registry.ready)
+        yield registry
+    finally:
+        await registry.stop()
+
+@pytest.fixture
+async def user_id(db_engine):
+    suffix = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        user_id = (await db.execute(
+            insert(User.__table__).values(username=f"rv_{suffix}", email=f"rv_{suffix}@example.com",
+                                          hashed_password="x", role="practice", failed_login_attempts=0)
+            .returning(User.__table__.c.id)
+        )).scalar_one()
+        await db.commit()
+    yield user_id
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+
+def revoked_token(token: str, lifetime: float = 600):
+    return token_digest(token), datetime.now(timezone.utc) + timedelta(seconds=lifetime)
+
+async def test_committed_notify_invalidates_other_connection(listener, eventually):
+    digest, expires_at = revoked_token(f"committed-{uuid.uuid4()}")
+    token_cache.set(digest, 1, False, time.time() + 600)
+
+    # Published from an app session, heard on the listener's own connection
+    async with AsyncSessionLocal() as db:
+        await publish_revocations(db, [(digest, expires_at)])
+        await db.commit()
+
+    assert await eventually(lambda: listener.is_revoked(digest))
+    assert token_cache.get(digest) is None
+    assert listener.notifications == 1
+
+async def test_rolled_back_notify_is_not_delivered(listener, eventually):
+    rolled_back, expires_at = revoked_token(f"rolled-back-{uuid.uuid4()}")
+    committed, _ = revoked_token(f"committed-{uuid.uuid4()}")
+
+    async with AsyncSessionLocal() as db:
+        await publish_revocations(db, [(rolled_back, expires_at)])
+        await db.rollback()
+    async with AsyncSessionLocal() as db:
+        await publish_revocations(db, [(committed, expires_at)])
+        await db.commit()
+
+    # Notifications arrive in commit order, so the rolled back one would be in by now
+    assert await eventually(lambda: listener.is_revoked(committed))
+    assert not listener.is_revoked(rolled_back)
+
+async def kill_listener_connection(listener: RevocationRegistry) -> None:
+    """Drop the listener's connection from the server side"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT pg_terminate_backend(:pid)"), {"pid": listener._conn.get_server_pid()})
+
+async def test_resync_after_reconnect(listener, user_id, eventually):
+    # A revocation committed without a notification, as if published while disconnected
+    suffix = uuid.uuid4().hex[:8]
+    digest, expires_at = revoked_token(f"missed-{suffix}")
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Token.__table__).values(
+            user_id=user_id, access_token_hash=digest, refresh_token_hash=token_digest(f"refresh-{suffix}"),
+            access_token_expires_at=expires_at, refresh_token_expires_at=expires_at, is_revoked=True,
+        ))
+        await db.commit()
+
+    assert not listener.is_revoked(digest)
+    resyncs = listener.resyncs
+
+    await kill_listener_connection(listener)
+    assert await eventually(lambda: listener.reconnects >= 1 and listener.ready)
+
+    assert listener.resyncs == resyncs + 1
+    assert listener.is_revoked(digest)
+
+async def test_revoked_during_outage_is_rejected(listener, user_id, monkeypatch, eventually):
+    monkeypatch.setattr(security, "revocation_registry", listener)
+    async with AsyncSessionLocal() as db:
+        issued = await Token.create_tokens(db, user_id)
+    headers = {"Authorization": f"Bearer {issued.access_token}"}
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        # Checked against the in-memory set and cached as valid
+        assert (await client.get("/api/protected", headers=headers)).status_code == 200
+
+        # Long pings and reconnect delay: only the closed connection can end readiness in time
+        monkeypatch.setattr(revocation, "REVOCATION_PING_INTERVAL", 30)
+        monkeypatch.setattr(revocation, "REVOCATION_RECONNECT_DELAY", 30)
+        await asyncio.sleep(0.2)  # past the last short ping
+        await kill_listener_connection(listener)
+        assert await eventually(lambda: not listener.ready, timeout=1.0)
+
+        # Revoked elsewhere while no notification can arrive
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Token.__table__).where(Token.__table__.c.access_token_hash
+                                                           == token_digest(issued.access_token))
+                             .values(is_revoked=True))
+            await db.commit()
+
+        assert (await client.get("/api/protected", headers=headers)).status_code == 401
+
+async def test_stale_ping_ends_readiness():
+    registry = RevocationRegistry(enabled=True)
+    registry._synced = True
+    registry._last_ping = time.monotonic()
+    assert registry.ready
+
+    # A connection that stopped answering without closing
+    registry._last_ping = time.monotonic() - 2 * revocation.REVOCATION_PING_INTERVAL
+    assert not registry.ready
+
+async def test_expired_revocations_are_not_kept():
+    registry = RevocationRegistry(enabled=True)
+    expired, live, soon = token_digest("expired"), token_digest("live"), token_digest("soon")
+
+    registry.add(expired, time.time() - 1)
+    registry.add(live, time.time() + 600)
+    registry.add(soon, time.time() + 600)
+    assert not registry.is_revoked(expired)
+    assert registry.stats()["revoked_tokens"] == 2
+
+    # Pruning drops entries once the token itself has expired
+    registry._revoked[soon] = time.time() - 1
+    assert not registry.is_revoked(soon)
+    registry.prune()
+    assert registry.stats()["revoked_tokens"] == 1
+    assert registry.is_revoked(live)
+
+async def test_listener_falls_back_while_disconnected(channel, monkeypatch, eventually):
+    # Until the listener has synced, get_current_user must keep querying the database
+    monkeypatch.setattr(revocation, "ASYNC_DATABASE_URL", "postgresql+asyncpg://nobody@127.0.0.1:1/none")
+    registry = RevocationRegistry(enabled=True, channel=channel)
+    await registry.start()
+    try:
+        assert await eventually(lambda: registry.reconnects >= 1)
+        assert not registry.ready
+    finally:
+        await registry.stop()